@@ -23,6 +23,30 @@ EXPORTS_DIR.mkdir(exist_ok=True)
 # Base de données
 DATABASE_PATH = DATA_DIR / "pointage.db"
 
+# Écriture groupée des pointages : journal sur disque immédiat, insertion SQLite par lots
+# (moins d'écritures sur la carte SD lors des pics de badgeage)
+GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "False").lower() == "true"
+GROUP_COMMIT_INTERVAL_MS = int(os.getenv("GROUP_COMMIT_INTERVAL_MS", "200"))
+GROUP_COMMIT_JOURNAL = DATA_DIR / "pointages.journal"
+
+# Archivage : les pointages plus vieux que N jours (déjà synchronisés et exportés) sont
+# déplacés vers des tables mensuelles. 0 = désactivé
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "365"))
+
+# Maintenance de la base (ANALYZE, VACUUM incrémental, checkpoint WAL)
+# Vérification toutes les N secondes ; maintenance complète une fois par nuit dans la plage horaire
+DB_MAINTENANCE_INTERVAL = int(os.getenv("DB_MAINTENANCE_INTERVAL", "900"))
+DB_MAINTENANCE_START_HOUR = int(os.getenv("DB_MAINTENANCE_START_HOUR", "2"))
+DB_MAINTENANCE_END_HOUR = int(os.getenv("DB_MAINTENANCE_END_HOUR", "5"))
+
+# Sauvegarde à chaud de la base (copie page par page, vérifiée et compressée)
+# Lancée lors d'une vérification de maintenance si la dernière date de plus de N heures
+BACKUP_ENABLED = os.getenv("BACKUP_ENABLED", "True").lower() == "true"
+BACKUP_DIR = Path(os.getenv("BACKUP_DIR") or BASE_DIR / "backups")
+BACKUP_INTERVAL_HOURS = float(os.getenv("BACKUP_INTERVAL_HOURS", "24"))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+BACKUP_COMPRESS = os.getenv("BACKUP_COMPRESS", "True").lower() == "true"
+
 # Fichier des employés
 EMPLOYEES_FILE = CONFIG_DIR / "employees.json"
 
@@ -43,6 +67,31 @@ RFID_PORT = os.getenv("RFID_PORT", "")  # Laissez vide pour auto-détection
 RFID_BAUDRATE = int(os.getenv("RFID_BAUDRATE", "9600"))
 RFID_TIMEOUT = float(os.getenv("RFID_TIMEOUT", "1.0"))
 
+# Synchronisation des pointages vers l'API : nombre de pointages envoyés par requête
+# (endpoint SYNC_BATCH_ENDPOINT). 1 = envoi unitaire (api_save_pointage.php)
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "50"))
+SYNC_BATCH_ENDPOINT = os.getenv("SYNC_BATCH_ENDPOINT", "api_save_pointages_batch.php")
+# Envoi unitaire (sans endpoint par lot) : nombre de requêtes simultanées, ordre conservé par employé
+# (au-delà de 4, taille du pool de connexions HTTP, les connexions supplémentaires ne sont pas réutilisées)
+SYNC_PARALLELISM = int(os.getenv("SYNC_PARALLELISM", "4"))
+
+# Planification de la synchronisation (secondes)
+SYNC_STARTUP_DELAY = float(os.getenv("SYNC_STARTUP_DELAY", "30"))            # premier cycle après le démarrage
+SYNC_NEW_POINTAGE_DELAY = float(os.getenv("SYNC_NEW_POINTAGE_DELAY", "5"))   # après un nouveau pointage
+SYNC_DRAIN_DELAY = float(os.getenv("SYNC_DRAIN_DELAY", "2"))                 # tant qu'il reste un arriéré
+SYNC_IDLE_INTERVAL = float(os.getenv("SYNC_IDLE_INTERVAL", "600"))           # sans nouveau pointage
+SYNC_BACKOFF_BASE = float(os.getenv("SYNC_BACKOFF_BASE", "30"))              # après un échec, doublé à chaque échec
+SYNC_BACKOFF_MAX = float(os.getenv("SYNC_BACKOFF_MAX", "1800"))              # recul maximum
+
+# Pointages refusés par l'API : reprise différée (délai doublé à chaque refus), puis mise à
+# l'écart après SYNC_MAX_ATTEMPTS refus (voir retry_sync_failures.py)
+SYNC_RETRY_BASE = float(os.getenv("SYNC_RETRY_BASE", "60"))
+SYNC_RETRY_MAX = float(os.getenv("SYNC_RETRY_MAX", "21600"))
+SYNC_MAX_ATTEMPTS = int(os.getenv("SYNC_MAX_ATTEMPTS", "10"))
+
+# Délai minimum entre deux pointages du même employé (anti-doublon), en secondes
+POINTAGE_MIN_INTERVAL = int(os.getenv("POINTAGE_MIN_INTERVAL", "1800"))
+
 # Synchronisation automatique des employés (employees.json) depuis l'API
 # 0 = désactivée, sinon intervalle en secondes (ex: 1800 = 30 min, 3600 = 1 h)
 EMPLOYEES_SYNC_INTERVAL = int(os.getenv("EMPLOYEES_SYNC_INTERVAL", "0"))
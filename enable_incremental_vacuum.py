@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Script pour convertir une base existante au VACUUM incrémental
+Les bases créées avant la maintenance automatique n'ont pas l'auto_vacuum : la conversion
+réécrit tout le fichier (VACUUM complet) et bloque les pointages pendant ce temps.
+À lancer une seule fois, application arrêtée.
+
+Usage: python enable_incremental_vacuum.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import settings
+from src.database import DatabaseManager
+
+def enable_incremental_vacuum():
+    """Convertit la base au VACUUM incrémental après confirmation"""
+
+    db_path = settings.DATABASE_PATH
+
+    if not db_path.exists():
+        print(f"❌ Base de données non trouvée: {db_path}")
+        sys.exit(1)
+
+    print(f"📂 Base de données: {db_path}")
+    size_before = db_path.stat().st_size
+    print(f"📊 Taille: {size_before / 1024 / 1024:.1f} Mo")
+    print()
+
+    print("⚠️  La conversion réécrit tout le fichier : arrêtez l'application avant de continuer.")
+    print("   Prévoir l'espace disque libre d'une copie de la base.")
+    print()
+    response = input("   Confirmer? (oui/non): ").strip().lower()
+    if response not in ['oui', 'o', 'yes', 'y']:
+        print("❌ Opération annulée")
+        return
+
+    db_manager = DatabaseManager(str(db_path))
+    try:
+        started = time.perf_counter()
+        converted = db_manager.enable_incremental_vacuum(
+            progress=lambda elapsed: print(f"   ⏳ VACUUM en cours... {elapsed:.0f} s", flush=True)
+        )
+        db_manager.checkpoint()
+    finally:
+        db_manager.close()
+
+    print()
+    if not converted:
+        print("✅ La base utilise déjà le VACUUM incrémental!")
+        return
+    size_after = db_path.stat().st_size
+    print(f"✅ Base convertie en {time.perf_counter() - started:.1f} s "
+          f"({size_before / 1024 / 1024:.1f} Mo → {size_after / 1024 / 1024:.1f} Mo)")
+    print("   La maintenance nocturne libère désormais l'espace inutilisé au fil de l'eau.")
+    print()
+
+if __name__ == "__main__":
+    try:
+        enable_incremental_vacuum()
+    except KeyboardInterrupt:
+        print("\n❌ Opération annulée par l'utilisateur")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Erreur: {e}")
+        sys.exit(1)
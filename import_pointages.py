@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Script pour importer en masse des pointages historiques (CSV ou JSONL)
+Utile lors du remplacement d'un ancien terminal ou pour réimporter un export serveur
+
+Formats acceptés :
+- CSV exporté par l'application (ID;Matricule;Nom;RFID;Date;Heure;Type)
+- CSV avec les colonnes employee_id, employee_name, rfid, timestamp, type
+- JSONL : un objet JSON par ligne avec ces mêmes clés
+
+Usage: python import_pointages.py fichier.csv [--synchronises] [--avec-doublons]
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import settings
+from src.database import DatabaseManager
+
+# Colonnes de l'export CSV de l'application -> clés attendues par la base
+CSV_EXPORT_COLUMNS = {
+    'Matricule': 'employee_id',
+    'Nom': 'employee_name',
+    'RFID': 'rfid',
+    'Type': 'type',
+}
+
+POINTAGE_TYPES = ('ENTREE', 'SORTIE')
+
+
+def read_jsonl(path: Path):
+    """Lit un fichier JSONL ligne par ligne"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def read_csv(path: Path):
+    """Lit un fichier CSV (séparateur détecté automatiquement) ligne par ligne"""
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        dialect = csv.Sniffer().sniff(f.readline(), delimiters=';,\t')
+        f.seek(0)
+        for row in csv.DictReader(f, dialect=dialect):
+            if 'Date' in row and 'Heure' in row:
+                # Format de l'export de l'application : date JJ/MM/AAAA et heure séparées
+                converted = {key: row.get(column, '') for column, key in CSV_EXPORT_COLUMNS.items()}
+                converted['timestamp'] = f"{row['Date']} {row['Heure']}"
+                yield converted
+            else:
+                yield row
+
+
+def parse_timestamp(value: str) -> str:
+    """Convertit un horodatage ISO ou JJ/MM/AAAA HH:MM:SS au format de la base"""
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        dt = datetime.strptime(value, "%d/%m/%Y %H:%M:%S")
+    # Même format que les pointages enregistrés par le terminal
+    return dt.isoformat(sep=' ')
+
+
+def normalize(rows, stats, mark_synced):
+    """Valide les pointages et normalise l'horodatage au format de la base"""
+    for row in rows:
+        try:
+            pointage_type = str(row['type']).strip().upper()
+            if pointage_type not in POINTAGE_TYPES:
+                raise ValueError(f"type inconnu '{row['type']}'")
+            pointage = {
+                'employee_id': str(row['employee_id']).strip(),
+                'employee_name': str(row.get('employee_name') or '').strip(),
+                'rfid': str(row.get('rfid') or '').strip(),
+                'timestamp': parse_timestamp(str(row['timestamp']).strip()),
+                'type': pointage_type,
+            }
+            if not pointage['employee_id']:
+                raise ValueError("matricule vide")
+        except (KeyError, TypeError, ValueError) as e:
+            stats['rejected'] += 1
+            if stats['rejected'] <= 10:
+                print(f"\n⚠️  Ligne ignorée ({e}): {row}")
+            continue
+
+        if mark_synced:
+            pointage['synced'] = 1
+            pointage['exported'] = 1
+        yield pointage
+
+
+def import_pointages():
+    """Importe un fichier de pointages dans la base"""
+
+    parser = argparse.ArgumentParser(description="Import en masse de pointages historiques")
+    parser.add_argument('fichier', type=Path, help="Fichier CSV ou JSONL à importer")
+    parser.add_argument('--synchronises', action='store_true',
+                        help="Marquer les pointages importés comme déjà synchronisés et exportés")
+    parser.add_argument('--avec-doublons', action='store_true',
+                        help="Ne pas écarter les pointages déjà présents (plus rapide)")
+    args = parser.parse_args()
+
+    if not args.fichier.exists():
+        print(f"❌ Fichier non trouvé: {args.fichier}")
+        sys.exit(1)
+
+    print(f"📂 Base de données: {settings.DATABASE_PATH}")
+    print(f"📄 Fichier importé: {args.fichier}")
+    if args.synchronises:
+        print("   Les pointages importés ne seront pas envoyés à l'API")
+    print()
+
+    if args.fichier.suffix.lower() in ('.jsonl', '.json'):
+        rows = read_jsonl(args.fichier)
+    else:
+        rows = read_csv(args.fichier)
+
+    stats = {'rejected': 0}
+    started = time.perf_counter()
+
+    def progress(count):
+        elapsed = time.perf_counter() - started
+        print(f"\r⏳ {count} pointages lus ({count / elapsed:.0f}/s)", end='', flush=True)
+
+    db_manager = DatabaseManager(str(settings.DATABASE_PATH))
+    try:
+        inserted = db_manager.import_pointages(
+            normalize(rows, stats, args.synchronises),
+            skip_existing=not args.avec_doublons,
+            progress=progress
+        )
+    finally:
+        db_manager.close()
+
+    print()
+    print()
+    print(f"✅ {inserted} pointages importés en {time.perf_counter() - started:.1f} s")
+    if stats['rejected']:
+        print(f"⚠️  {stats['rejected']} lignes invalides ignorées")
+    print()
+
+if __name__ == "__main__":
+    try:
+        import_pointages()
+    except KeyboardInterrupt:
+        print("\n❌ Opération annulée par l'utilisateur")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Erreur: {e}")
+        sys.exit(1)
@@ -111,6 +111,8 @@ def main():
         # Initialiser la base de données
         logger.info(f"Initialisation de la base de données: {settings.DATABASE_PATH}")
         db_manager = DatabaseManager(str(settings.DATABASE_PATH))
+        if settings.GROUP_COMMIT_ENABLED:
+            db_manager.enable_group_commit(settings.GROUP_COMMIT_JOURNAL, settings.GROUP_COMMIT_INTERVAL_MS)
         
         # Initialiser le lecteur RFID (auto-détection)
         logger.info("Initialisation du lecteur RFID")
@@ -137,7 +139,11 @@ def main():
         logger.info("Interface graphique lancée")
         
         # Lancer l'application
-        return app.exec_()
+        exit_code = app.exec_()
+        
+        # Fermer proprement les connexions SQLite (checkpoint du WAL)
+        db_manager.close()
+        return exit_code
         
     except Exception as e:
         logger.exception(f"Erreur fatale: {e}")
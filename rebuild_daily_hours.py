@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Script pour recalculer la table de synthèse des heures (daily_hours)
+Utile après une correction manuelle de pointages dans la base
+
+Usage: python rebuild_daily_hours.py [AAAA-MM-JJ]
+       (sans date : recalcul de tout l'historique)
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import settings
+from src.database import DatabaseManager
+
+def rebuild_daily_hours():
+    """Recalcule daily_hours depuis les pointages bruts"""
+
+    db_path = settings.DATABASE_PATH
+
+    if not db_path.exists():
+        print(f"❌ Base de données non trouvée: {db_path}")
+        sys.exit(1)
+
+    since_day = None
+    if len(sys.argv) > 1:
+        try:
+            since_day = date.fromisoformat(sys.argv[1])
+        except ValueError:
+            print(f"❌ Date invalide: {sys.argv[1]} (format attendu: AAAA-MM-JJ)")
+            sys.exit(1)
+
+    print(f"📂 Base de données: {db_path}")
+    if since_day:
+        print(f"📅 Recalcul à partir du {since_day.strftime('%d/%m/%Y')}")
+    else:
+        print("📅 Recalcul de tout l'historique")
+    print()
+
+    db_manager = DatabaseManager(str(db_path))
+    try:
+        written = db_manager.rebuild_daily_hours(since_day)
+    finally:
+        db_manager.close()
+
+    print(f"✅ {written} journées (employé, jour) recalculées!")
+    print()
+
+if __name__ == "__main__":
+    try:
+        rebuild_daily_hours()
+    except KeyboardInterrupt:
+        print("\n❌ Opération annulée par l'utilisateur")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Erreur: {e}")
+        sys.exit(1)
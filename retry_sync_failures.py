@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script pour renvoyer les pointages mis à l'écart par la synchronisation
+Un pointage refusé SYNC_MAX_ATTEMPTS fois par l'API n'est plus envoyé ; après correction
+côté serveur (employé manquant, ...), ce script le remet dans la file d'envoi
+
+Usage: python retry_sync_failures.py
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import settings
+from src.database import DatabaseManager
+
+def retry_sync_failures():
+    """Liste les pointages mis à l'écart et les remet en file après confirmation"""
+
+    db_path = settings.DATABASE_PATH
+
+    if not db_path.exists():
+        print(f"❌ Base de données non trouvée: {db_path}")
+        sys.exit(1)
+
+    print(f"📂 Base de données: {db_path}")
+    print()
+
+    db_manager = DatabaseManager(str(db_path))
+    try:
+        dead_letters = db_manager.get_dead_letters()
+
+        if not dead_letters:
+            print("✅ Aucun pointage mis à l'écart!")
+            return
+
+        print(f"📊 Pointages refusés par l'API: {len(dead_letters)}")
+        for p in dead_letters:
+            timestamp = datetime.fromisoformat(p['timestamp']).strftime('%d/%m/%Y %H:%M:%S')
+            print(f"   - #{p['id']} {p['employee_name']} ({p['employee_id']}) {p['type']} {timestamp}: "
+                  f"{p['attempts']} refus, {p['last_error']}")
+        print()
+
+        response = input("   Remettre ces pointages en file d'envoi? (oui/non): ").strip().lower()
+        if response not in ['oui', 'o', 'yes', 'y']:
+            print("❌ Opération annulée")
+            return
+
+        requeued = db_manager.requeue_dead_letters()
+    finally:
+        db_manager.close()
+
+    print()
+    print(f"✅ {requeued} pointages remis en file d'envoi!")
+    print("   Ils seront envoyés à la prochaine synchronisation.")
+    print()
+
+if __name__ == "__main__":
+    try:
+        retry_sync_failures()
+    except KeyboardInterrupt:
+        print("\n❌ Opération annulée par l'utilisateur")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Erreur: {e}")
+        sys.exit(1)
@@ -0,0 +1,4 @@
+from .client import ApiClient, get_api_client
+from .employees import download_employees
+
+__all__ = ['ApiClient', 'get_api_client', 'download_employees']
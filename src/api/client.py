@@ -0,0 +1,107 @@
+"""
+Client HTTP partagé pour l'API du site web
+
+Toutes les requêtes passent par une session requests unique par serveur : les connexions
+(TCP + TLS) restent ouvertes et sont réutilisées d'un appel à l'autre, au lieu d'une
+nouvelle poignée de main à chaque requests.get/post.
+"""
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+API_POOL_SIZE = 4          # connexions gardées ouvertes par serveur (sync, interface, admin)
+API_RETRIES = 2            # nouvelles tentatives sur erreur de connexion ou 502/503/504
+API_BACKOFF = 0.5          # attente entre tentatives : 0.5 s, 1 s, ...
+API_TIMEOUT = 10           # délai par défaut (secondes)
+
+
+class ApiClient:
+    """Session HTTP persistante vers l'API, avec en-têtes d'authentification par défaut"""
+
+    def __init__(self, base_url: str, id_compte=None, api_key: Optional[str] = None,
+                 pool_size: int = API_POOL_SIZE, retries: int = API_RETRIES, verify: bool = False):
+        """
+        Args:
+            base_url: URL de base de l'API (sans slash final)
+            id_compte: ID du compte (en-tête X-Account-ID)
+            api_key: Clé API (en-tête X-API-Key)
+            pool_size: Nombre de connexions conservées
+            retries: Nouvelles tentatives automatiques
+            verify: Vérifier le certificat TLS (désactivé : certificats auto-signés en local)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.verify = verify
+
+        # Les POST ne sont retentés que si la connexion n'a pas pu être établie
+        # (requête jamais reçue par le serveur) : pas de pointage envoyé deux fois
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=API_BACKOFF,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if api_key:
+            self.session.headers['X-API-Key'] = api_key
+        if id_compte is not None:
+            self.session.headers['X-Account-ID'] = str(id_compte)
+
+    def url(self, endpoint: str) -> str:
+        """URL complète d'un endpoint ('api_list_employees.php' ou URL absolue)"""
+        if endpoint.startswith(('http://', 'https://')):
+            return endpoint
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """Envoie une requête sur la session partagée (délai et vérification TLS par défaut)"""
+        kwargs.setdefault('timeout', API_TIMEOUT)
+        kwargs.setdefault('verify', self.verify)
+        return self.session.request(method, self.url(endpoint), **kwargs)
+
+    def get(self, endpoint: str, **kwargs) -> requests.Response:
+        """Requête GET"""
+        return self.request('GET', endpoint, **kwargs)
+
+    def post(self, endpoint: str, **kwargs) -> requests.Response:
+        """Requête POST"""
+        return self.request('POST', endpoint, **kwargs)
+
+    def close(self):
+        """Ferme les connexions ouvertes"""
+        self.session.close()
+
+
+_clients: Dict[Tuple, ApiClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_api_client(base_url: str, id_compte=None, api_key: Optional[str] = None) -> ApiClient:
+    """
+    Retourne le client partagé pour ce serveur et ce compte (créé au premier appel)
+
+    Args:
+        base_url: URL de base de l'API
+        id_compte: ID du compte
+        api_key: Clé API
+    """
+    key = (base_url.rstrip('/'), str(id_compte) if id_compte is not None else None, api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = ApiClient(base_url, id_compte, api_key)
+            logger.debug(f"Client API créé pour {key[0]} (compte {key[1]})")
+        return client
@@ -0,0 +1,135 @@
+"""
+Téléchargement de la liste des employés (employees.json) depuis l'API
+
+Le rafraîchissement périodique ne coûte que quelques octets quand rien n'a changé :
+
+- requête conditionnelle : If-None-Match / If-Modified-Since avec l'ETag et la date
+  Last-Modified de la dernière réponse ; le serveur répond 304 sans contenu ;
+- transfert compressé (Accept-Encoding: gzip, décompressé par requests) ;
+- mode delta : la version de la liste locale est envoyée (paramètre since) ; le serveur
+  peut ne renvoyer que les changements :
+  {"delta": true, "version": "...", "employees": [modifiés/ajoutés], "deleted": ["EMP003", ...]}
+
+Sans aucun de ces mécanismes côté serveur, la réponse complète est comparée (SHA-256) à la
+précédente : le fichier n'est réécrit et rechargé que s'il a changé.
+"""
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .client import ApiClient
+
+logger = logging.getLogger(__name__)
+
+EMPLOYEES_ENDPOINT = "api_download_employees_json.php"
+EMPLOYEES_TIMEOUT = 15
+# Validateurs de la dernière réponse (ETag, Last-Modified, version, empreinte), à côté du fichier
+META_SUFFIX = ".meta"
+
+
+def download_employees(api: ApiClient, id_compte, employees_file: Path, force: bool = False) -> Optional[int]:
+    """
+    Met à jour employees.json depuis l'API
+
+    Args:
+        api: Client de l'API
+        id_compte: ID du compte
+        employees_file: Fichier employees.json local
+        force: Télécharger la liste complète sans requête conditionnelle
+
+    Returns:
+        Nombre d'employés si le fichier a été réécrit, None si la liste n'a pas changé
+
+    Raises:
+        requests.RequestException: erreur réseau ou erreur serveur
+        ValueError: réponse illisible
+    """
+    employees_file = Path(employees_file)
+    meta_file = employees_file.with_name(employees_file.name + META_SUFFIX)
+    meta = {} if force or not employees_file.exists() else _read_json(meta_file, {})
+
+    params = {'id_compte': id_compte}
+    headers = {'Accept-Encoding': 'gzip'}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    if meta.get('version'):
+        params['since'] = meta['version']
+
+    response = api.get(EMPLOYEES_ENDPOINT, params=params, headers=headers, timeout=EMPLOYEES_TIMEOUT)
+    if response.status_code == 304:
+        logger.debug("Liste des employés inchangée (304)")
+        return None
+    response.raise_for_status()
+    data = response.json()
+
+    new_meta = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'version': data.get('version') if isinstance(data, dict) else None,
+    }
+
+    if isinstance(data, dict) and data.get('delta'):
+        changed = data.get('employees') or []
+        deleted = data.get('deleted') or []
+        if not changed and not deleted:
+            _write_json(meta_file, new_meta)
+            return None
+        employees = _merge_delta(_read_employees(employees_file), changed, deleted)
+        content = json.dumps({'employees': employees}, ensure_ascii=False, indent=2)
+        logger.info(f"Liste des employés: {len(changed)} modifié(s), {len(deleted)} supprimé(s)")
+    else:
+        new_meta['sha256'] = hashlib.sha256(response.content).hexdigest()
+        if new_meta['sha256'] == meta.get('sha256'):
+            _write_json(meta_file, new_meta)
+            logger.debug("Liste des employés inchangée (même contenu)")
+            return None
+        employees = data if isinstance(data, list) else data.get('employees', [])
+        # JSON : toujours UTF-8 (pas de détection d'encodage par requests)
+        content = response.content.decode('utf-8')
+
+    _write_text(employees_file, content)
+    _write_json(meta_file, new_meta)
+    return len(employees)
+
+
+def _merge_delta(employees: List[Dict], changed: List[Dict], deleted: List[str]) -> List[Dict]:
+    """Applique un delta à la liste locale (clé : employee_id), dans l'ordre de la liste"""
+    merged = {emp['employee_id']: emp for emp in employees}
+    for employee_id in deleted:
+        merged.pop(employee_id, None)
+    for emp in changed:
+        merged[emp['employee_id']] = emp
+    return list(merged.values())
+
+
+def _read_employees(path: Path) -> List[Dict]:
+    """Liste des employés du fichier local (tableau direct ou objet avec clé 'employees')"""
+    data = _read_json(path, [])
+    return data if isinstance(data, list) else data.get('employees', [])
+
+
+def _read_json(path: Path, default):
+    """Lit un fichier JSON ; default s'il est absent ou illisible"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path: Path, data):
+    """Écrit un fichier JSON (voir _write_text)"""
+    _write_text(path, json.dumps(data, ensure_ascii=False))
+
+
+def _write_text(path: Path, content: str):
+    """Écrit un fichier en le remplaçant d'un bloc : jamais de fichier à moitié écrit"""
+    partial = path.with_name(path.name + ".partial")
+    with open(partial, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(partial, path)
@@ -1,6 +1,7 @@
-from .db_manager import DatabaseManager
+from .db_manager import DatabaseManager, PointageRow
+from .backup import DatabaseBackup
 
-__all__ = ['DatabaseManager']
+__all__ = ['DatabaseManager', 'PointageRow', 'DatabaseBackup']
 
 
 
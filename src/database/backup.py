@@ -0,0 +1,180 @@
+"""
+Sauvegarde à chaud de la base de pointage
+
+Copie par l'API de sauvegarde en ligne de SQLite, par paquets de pages, dans un
+instantané de lecture (WAL) : les pointages continuent d'être enregistrés pendant la
+copie. Chaque sauvegarde est vérifiée (PRAGMA integrity_check), compressée en gzip puis
+les plus anciennes sont supprimées.
+"""
+import gzip
+import logging
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PAGES_PER_STEP = 256   # pages copiées par étape (1 Mo avec des pages de 4 Ko)
+BACKUP_STEP_PAUSE = 0.01      # pause entre deux étapes (secondes)
+
+
+class DatabaseBackup:
+    """Sauvegardes tournantes de la base, exécutées dans un thread d'arrière-plan"""
+
+    def __init__(self, db_path, backup_dir: Path, keep: int = 7, compress: bool = True,
+                 pages_per_step: int = BACKUP_PAGES_PER_STEP, step_pause: float = BACKUP_STEP_PAUSE):
+        """
+        Args:
+            db_path: Base à sauvegarder
+            backup_dir: Répertoire des sauvegardes
+            keep: Nombre de sauvegardes conservées
+            compress: Compresser les sauvegardes (gzip)
+            pages_per_step: Pages copiées par étape de l'API de sauvegarde
+            step_pause: Pause entre deux étapes, pour laisser la main aux pointages
+        """
+        self.db_path = Path(db_path)
+        self.backup_dir = Path(backup_dir)
+        self.keep = keep
+        self.compress = compress
+        self.pages_per_step = pages_per_step
+        self.step_pause = step_pause
+        self.prefix = self.db_path.stem + "_"
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def list_backups(self) -> List[Path]:
+        """Sauvegardes existantes, de la plus récente à la plus ancienne"""
+        if not self.backup_dir.exists():
+            return []
+        backups = [p for p in self.backup_dir.glob(self.prefix + "*")
+                   if p.name.endswith(('.db', '.db.gz'))]
+        return sorted(backups, key=lambda p: p.name, reverse=True)
+
+    def is_due(self, interval_hours: float) -> bool:
+        """Indique si la dernière sauvegarde date de plus de interval_hours heures"""
+        backups = self.list_backups()
+        if not backups:
+            return True
+        last = datetime.fromtimestamp(backups[0].stat().st_mtime)
+        return datetime.now() - last >= timedelta(hours=interval_hours)
+
+    def is_running(self) -> bool:
+        """Indique si une sauvegarde est en cours"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """
+        Lance une sauvegarde dans un thread d'arrière-plan
+
+        Returns:
+            False si une sauvegarde est déjà en cours
+        """
+        with self._lock:
+            if self.is_running():
+                return False
+            self._thread = threading.Thread(target=self._run, name="DatabaseBackup", daemon=True)
+            self._thread.start()
+            return True
+
+    def wait(self, timeout: Optional[float] = None):
+        """Attend la fin de la sauvegarde en cours"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        """Point d'entrée du thread : les erreurs sont journalisées"""
+        try:
+            self.backup()
+        except Exception as e:
+            logger.error(f"Erreur lors de la sauvegarde de la base: {e}")
+
+    def backup(self) -> Path:
+        """
+        Effectue une sauvegarde complète (appel bloquant)
+
+        Returns:
+            Chemin de la sauvegarde créée
+
+        Raises:
+            sqlite3.DatabaseError: si la copie échoue le contrôle d'intégrité
+        """
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        # Copies inachevées d'une sauvegarde interrompue (arrêt de l'application)
+        for stale in self.backup_dir.glob(self.prefix + "*.partial"):
+            stale.unlink()
+        started = time.perf_counter()
+        name = f"{self.prefix}{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+        target = self.backup_dir / name
+        partial = target.with_name(name + ".partial")
+
+        try:
+            self._copy(partial)
+            self._check_integrity(partial)
+            if self.compress:
+                target = target.with_name(name + ".gz")
+                self._compress(partial, target)
+                partial.unlink()
+            else:
+                partial.replace(target)
+        except Exception:
+            for path in (partial, target.with_name(target.name + ".partial")):
+                if path.exists():
+                    path.unlink()
+            raise
+
+        removed = self._rotate()
+        logger.info(f"Sauvegarde de la base: {target.name} ({target.stat().st_size // 1024} Ko) "
+                    f"en {time.perf_counter() - started:.1f} s, {removed} ancienne(s) supprimée(s)")
+        return target
+
+    def _copy(self, destination: Path):
+        """Copie la base page par page depuis un instantané de lecture"""
+        source = sqlite3.connect(self.db_path.resolve().as_uri() + "?mode=ro", uri=True)
+        target = sqlite3.connect(str(destination))
+        try:
+            # Transaction de lecture : la copie porte sur un instantané fixe et ne
+            # redémarre pas à chaque pointage écrit par une autre connexion
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(target, pages=self.pages_per_step,
+                          progress=lambda status, remaining, total: time.sleep(self.step_pause))
+            source.rollback()
+            # Fichier autonome : pas de -wal/-shm à côté de la sauvegarde
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+            source.close()
+
+    @staticmethod
+    def _check_integrity(path: Path):
+        """Vérifie l'intégrité d'une copie"""
+        conn = sqlite3.connect(str(path))
+        try:
+            result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+        if result != 'ok':
+            raise sqlite3.DatabaseError(f"Sauvegarde corrompue ({path.name}): {result}")
+
+    @staticmethod
+    def _compress(source: Path, target: Path):
+        """Compresse une copie puis relit l'archive (contrôle CRC gzip)"""
+        partial = target.with_name(target.name + ".partial")
+        with open(source, 'rb') as f_in, gzip.open(partial, 'wb', compresslevel=6) as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        with gzip.open(partial, 'rb') as f:
+            while f.read(1024 * 1024):
+                pass
+        partial.replace(target)
+
+    def _rotate(self) -> int:
+        """Supprime les sauvegardes au-delà des keep plus récentes"""
+        removed = 0
+        for path in self.list_backups()[self.keep:]:
+            path.unlink()
+            removed += 1
+        return removed
@@ -2,23 +2,226 @@
 Gestionnaire de base de données pour le système de pointage
 """
 import sqlite3
-from datetime import datetime, date
-from typing import List, Dict, Optional
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime, date, timedelta
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple, Union
 import logging
 
+from .migrations import DAILY_HOURS_VERSION, run_migrations
+
 logger = logging.getLogger(__name__)
 
+# Réglages SQLite appliqués à chaque connexion (optimisés pour carte SD / Raspberry)
+SQLITE_BUSY_TIMEOUT = 5.0          # secondes d'attente si la base est verrouillée
+SQLITE_CACHE_SIZE_KB = 8192        # cache de pages par connexion (8 Mo)
+SQLITE_MMAP_SIZE = 64 * 1024 * 1024  # lecture mappée en mémoire (64 Mo)
+SQLITE_STATEMENT_CACHE = 64        # requêtes préparées conservées par connexion
+SQLITE_FETCH_CHUNK = 500           # lignes lues par paquet par les itérateurs iter_*
+SQLITE_IN_CHUNK = 500              # IDs par clause IN (limite historique SQLite : 999 variables)
+SQLITE_VACUUM_PAGES = 2000         # pages libres rendues au système par passe de maintenance
+AUTO_VACUUM_INCREMENTAL = 2        # valeur de PRAGMA auto_vacuum en mode INCREMENTAL
+SQLITE_IMPORT_CHUNK = 50000        # pointages par transaction lors d'un import en masse
+
+# Reprise des pointages refusés par l'API (file sync_outbox)
+SYNC_RETRY_BASE = 60               # délai avant la 2e tentative (secondes), doublé ensuite
+SYNC_RETRY_MAX = 6 * 3600          # délai maximum entre deux tentatives
+SYNC_MAX_ATTEMPTS = 10             # tentatives avant mise à l'écart (dead letter)
+
+# Ligne de pointage compacte (tuple nommé : pas de dict alloué par ligne)
+PointageRow = namedtuple('PointageRow', [
+    'id', 'employee_id', 'employee_name', 'rfid', 'timestamp', 'type', 'exported', 'synced'
+])
+
+# Colonnes lues par les méthodes de lecture, dans l'ordre des champs de PointageRow
+POINTAGE_COLUMNS = "id, employee_id, employee_name, rfid, timestamp, type, exported, synced"
+
+# Archivage mensuel : tables pointages_archive_AAAAMM + vue de consultation qui les réunit
+ARCHIVE_TABLE_PREFIX = "pointages_archive_"
+REPORTING_VIEW = "pointages_all"
+ARCHIVE_COLUMNS = POINTAGE_COLUMNS + ", created_at"
+
+# Pointages de la file sync_outbox à envoyer maintenant (:now), dans l'ordre chronologique.
+# Un employé dont un pointage attend sa prochaine tentative n'envoie pas les suivants
+# (une SORTIE ne part jamais avant l'ENTREE qui la précède) ; un pointage écarté ne bloque plus.
+# CROSS JOIN : la (petite) file est parcourue en premier, jamais toute la table pointages par
+# idx_timestamp, même sans statistiques (sqlite_stat1).
+SYNC_DUE_QUERY = f"""
+    WITH waiting AS (
+        SELECT p.employee_id AS waiting_employee, MIN(p.timestamp) AS waiting_since
+        FROM sync_outbox o CROSS JOIN pointages p ON p.id = o.pointage_id
+        WHERE o.dead = 0 AND o.next_attempt_at > :now
+        GROUP BY p.employee_id
+    )
+    SELECT {POINTAGE_COLUMNS}
+    FROM sync_outbox o
+    CROSS JOIN pointages p ON p.id = o.pointage_id
+    LEFT JOIN waiting w ON w.waiting_employee = p.employee_id
+    WHERE o.dead = 0 AND o.next_attempt_at <= :now
+      AND (w.waiting_since IS NULL OR p.timestamp < w.waiting_since)
+    ORDER BY p.timestamp
+"""
+
+# Fonctions de fenêtrage (LEAD ... OVER) disponibles à partir de SQLite 3.25
+WINDOW_FUNCTIONS_AVAILABLE = sqlite3.sqlite_version_info >= (3, 25, 0)
 
 class DatabaseManager:
     """Gère toutes les opérations de base de données"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, read_only: bool = False):
+        """
+        Args:
+            db_path: Chemin de la base SQLite
+            read_only: Connexions en lecture seule, sans initialisation du schéma (voir reader())
+        """
         self.db_path = db_path
-        self.init_database()
+        self.read_only = read_only
+        # Une connexion persistante par thread (sqlite3 interdit le partage entre threads)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # Dernier pointage de chaque employé, tenu à jour à chaque insertion (write-through)
+        self._last_pointages: Dict[str, Dict] = {}
+        self._last_pointages_lock = threading.Lock()
+        # Écriture groupée optionnelle (voir enable_group_commit)
+        self._group_writer = None
+        # Accès en lecture seule partagé (voir reader())
+        self._reader = None
+        self._terminal_id = None
+        if not read_only:
+            self.init_database()
+            self._load_last_pointages()
+    
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Retourne la connexion persistante du thread courant
+        
+        La connexion est créée à la première utilisation puis réutilisée :
+        plus de coût d'ouverture ni de relecture du schéma à chaque pointage.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open_connection()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def _open_connection(self) -> sqlite3.Connection:
+        """Ouvre et configure une nouvelle connexion SQLite"""
+        if self.read_only:
+            return self._open_read_only_connection()
+        
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=SQLITE_BUSY_TIMEOUT,
+            cached_statements=SQLITE_STATEMENT_CACHE,
+            # Chaque connexion reste propre à son thread ; close() peut la fermer depuis le thread principal
+            check_same_thread=False
+        )
+        # Nouvelle base : permettre le VACUUM incrémental. Doit précéder le passage en WAL ;
+        # sans effet sur une base existante (voir enable_incremental_vacuum.py)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # WAL : les lectures (sync, admin) ne bloquent plus l'écriture d'un pointage
+        conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL suffit en WAL : plus de fsync à chaque commit, base toujours cohérente
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
+    def _open_read_only_connection(self) -> sqlite3.Connection:
+        """Ouvre une connexion en lecture seule (URI mode=ro) : aucune écriture ni verrou d'écriture possible"""
+        conn = sqlite3.connect(
+            Path(self.db_path).resolve().as_uri() + "?mode=ro",
+            uri=True,
+            timeout=SQLITE_BUSY_TIMEOUT,
+            cached_statements=SQLITE_STATEMENT_CACHE,
+            check_same_thread=False
+        )
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
+    def reader(self) -> 'DatabaseManager':
+        """
+        Retourne l'accès en lecture seule à la base, pour les rapports et les exports
+        
+        En WAL, un lecteur ne bloque jamais l'insertion d'un pointage : une longue requête
+        de l'administration n'occupe ainsi aucune connexion d'écriture. Les méthodes de
+        lecture (get_pointages_by_date, iter_non_exported, ...) s'utilisent comme d'habitude ;
+        les écritures échouent.
+        """
+        if self.read_only:
+            return self
+        with self._connections_lock:
+            if self._reader is None:
+                self._reader = DatabaseManager(self.db_path, read_only=True)
+            return self._reader
     
-    def get_connection(self):
-        """Crée une connexion à la base de données"""
-        return sqlite3.connect(self.db_path)
+    @contextmanager
+    def snapshot(self):
+        """
+        Regroupe des lectures dans un même instantané de la base (transaction de lecture WAL)
+        
+        Toutes les requêtes du bloc voient la base telle qu'au début du bloc, même si des
+        pointages sont insérés entre-temps (ex. comptage puis export cohérents). À utiliser
+        de préférence sur reader().
+        """
+        conn = self.get_connection()
+        if conn.in_transaction:
+            # Instantané déjà ouvert par l'appelant
+            yield self
+            return
+        
+        conn.execute("BEGIN")
+        try:
+            # La première lecture fixe l'instantané
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            yield self
+        finally:
+            conn.rollback()
+    
+    def enable_group_commit(self, journal_path, flush_interval_ms: int = 200, fsync: bool = True):
+        """
+        Active l'écriture groupée : les pointages sont journalisés puis insérés par lots
+        
+        Les journaux laissés par un arrêt brutal sont rejoués immédiatement.
+        
+        Args:
+            journal_path: Fichier journal d'écriture anticipée
+            flush_interval_ms: Intervalle entre deux insertions groupées
+            fsync: Forcer l'écriture du journal sur disque à chaque pointage
+        """
+        from .group_commit import GroupCommitWriter
+        
+        if self._group_writer is not None:
+            return
+        writer = GroupCommitWriter(self, journal_path, flush_interval_ms, fsync)
+        writer.start()
+        self._group_writer = writer
+    
+    def close(self):
+        """Ferme toutes les connexions ouvertes (à appeler à l'arrêt de l'application)"""
+        if self._group_writer is not None:
+            self._group_writer.stop()
+            self._group_writer = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+        logger.info("Connexions à la base de données fermées")
     
     def init_database(self):
         """Initialise les tables de la base de données"""
@@ -40,32 +243,360 @@ class DatabaseManager:
             )
         """)
         
-        # Ajouter la colonne synced si elle n'existe pas (migration)
-        try:
-            cursor.execute("ALTER TABLE pointages ADD COLUMN synced INTEGER DEFAULT 0")
-            logger.info("Colonne 'synced' ajoutée à la table pointages")
-        except sqlite3.OperationalError:
-            # La colonne existe déjà
-            pass
-        
         # Index pour améliorer les performances
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_employee_id ON pointages(employee_id)
-        """)
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_timestamp ON pointages(timestamp)
         """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_exported ON pointages(exported)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_synced ON pointages(synced)
-        """)
         
         conn.commit()
-        conn.close()
+        
+        # Évolutions du schéma (colonnes, index...) : voir migrations.py
+        applied = run_migrations(conn)
+        self._restore_deferred_indexes(conn)
+        with conn:
+            self._create_reporting_view(conn, replace=False)
+        if DAILY_HOURS_VERSION in applied:
+            # Nouvelle table de synthèse : calculée une fois depuis tout l'historique
+            self.rebuild_daily_hours()
         logger.info("Base de données initialisée")
     
+    @staticmethod
+    def _restore_deferred_indexes(conn: sqlite3.Connection):
+        """Recrée les index supprimés par un import en masse (voir import_pointages)"""
+        deferred = conn.execute("SELECT name, sql FROM deferred_indexes").fetchall()
+        for name, index_sql in deferred:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+            ).fetchone()
+            with conn:
+                conn.execute("DELETE FROM deferred_indexes WHERE name = ?", (name,))
+                if not exists:
+                    conn.execute(index_sql)
+            logger.info(f"Index {name} reconstruit")
+    
+    def _load_last_pointages(self):
+        """Charge en mémoire le dernier pointage de chaque employé (une seule requête au démarrage)"""
+        conn = self.get_connection()
+        # SQLite renvoie les colonnes de la ligne portant le MAX(timestamp) de chaque groupe
+        cursor = conn.execute("""
+            SELECT id, employee_id, employee_name, rfid, MAX(timestamp), type
+            FROM pointages
+            GROUP BY employee_id
+        """)
+        
+        last_pointages = {}
+        for row in cursor:
+            last_pointages[row[1]] = {
+                'id': row[0],
+                'employee_id': row[1],
+                'employee_name': row[2],
+                'rfid': row[3],
+                'timestamp': row[4],
+                'type': row[5]
+            }
+        
+        with self._last_pointages_lock:
+            self._last_pointages = last_pointages
+        logger.info(f"Derniers pointages chargés en mémoire: {len(last_pointages)} employé(s)")
+    
+    def _insert_pointage(self, employee_id: str, employee_name: str, rfid: str,
+                         pointage_type: str) -> Optional[int]:
+        """Insère un pointage et met à jour le cache (appelé avec _last_pointages_lock acquis)"""
+        # Même format que l'adaptateur datetime de sqlite3 ('AAAA-MM-JJ HH:MM:SS.ffffff')
+        timestamp = datetime.now().isoformat(sep=' ')
+        
+        if self._group_writer is not None:
+            # Écriture groupée : journalisé (durable) maintenant, inséré au prochain lot
+            self._group_writer.submit({
+                'employee_id': employee_id,
+                'employee_name': employee_name,
+                'rfid': rfid,
+                'timestamp': timestamp,
+                'type': pointage_type
+            })
+            pointage_id = None
+        else:
+            conn = self.get_connection()
+            # Connexion persistante : commit ou rollback explicite pour ne jamais laisser de transaction ouverte
+            with conn:
+                cursor = conn.execute("""
+                    INSERT INTO pointages (employee_id, employee_name, rfid, timestamp, type)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (employee_id, employee_name, rfid, timestamp, pointage_type))
+                self._add_to_daily_hours(conn, employee_id, employee_name, timestamp, pointage_type)
+            pointage_id = cursor.lastrowid
+        
+        # Le cache n'est mis à jour qu'après un commit (ou une journalisation) réussi
+        self._last_pointages[employee_id] = {
+            'id': pointage_id,
+            'employee_id': employee_id,
+            'employee_name': employee_name,
+            'rfid': rfid,
+            'timestamp': timestamp,
+            'type': pointage_type
+        }
+        
+        logger.info(f"Pointage ajouté: {employee_name} - {pointage_type} - {timestamp}")
+        return pointage_id
+    
+    def insert_pointages(self, pointages: Iterable[Dict], skip_existing: bool = False) -> int:
+        """
+        Insère un lot de pointages horodatés en une seule transaction
+        
+        Args:
+            pointages: Dictionnaires avec employee_id, employee_name, rfid, timestamp, type
+            skip_existing: Ignorer les pointages déjà présents (même employé, même timestamp)
+        
+        Returns:
+            Nombre de pointages insérés
+        """
+        pointages = list(pointages)
+        if not pointages:
+            return 0
+        
+        conn = self.get_connection()
+        with conn:
+            if skip_existing:
+                # Doublons cherchés aussi dans les archives mensuelles (vue pointages_all)
+                cursor = conn.executemany(f"""
+                    INSERT INTO pointages (employee_id, employee_name, rfid, timestamp, type)
+                    SELECT ?, ?, ?, ?, ?
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM {REPORTING_VIEW} WHERE employee_id = ? AND timestamp = ?
+                    )
+                """, ((p['employee_id'], p['employee_name'], p['rfid'], p['timestamp'], p['type'],
+                       p['employee_id'], p['timestamp']) for p in pointages))
+            else:
+                cursor = conn.executemany("""
+                    INSERT INTO pointages (employee_id, employee_name, rfid, timestamp, type)
+                    VALUES (?, ?, ?, ?, ?)
+                """, ((p['employee_id'], p['employee_name'], p['rfid'], p['timestamp'], p['type'])
+                      for p in pointages))
+            inserted = cursor.rowcount
+            self._refresh_daily_hours(conn, pointages)
+        
+        self._refresh_last_pointages(conn, pointages)
+        return inserted
+    
+    def import_pointages(self, pointages: Iterable[Dict], chunk_size: int = SQLITE_IMPORT_CHUNK,
+                         skip_existing: bool = True, defer_indexes: bool = True,
+                         progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Importe en masse des pointages historiques (ancien terminal, export serveur)
+        
+        Les pointages sont lus au fil de l'eau et insérés par executemany, une transaction
+        par paquet de chunk_size. Les doublons sont écartés paquet par paquet via une table
+        temporaire (une seule requête ensembliste), y compris dans les archives mensuelles
+        (vue pointages_all). Les index secondaires sont reconstruits une seule fois à la fin
+        (sauf idx_employee_timestamp, utilisé pour les doublons),
+        de même que la synthèse daily_hours et le cache des derniers pointages.
+        
+        Args:
+            pointages: Dictionnaires avec employee_id, employee_name, rfid, timestamp, type
+                       (synced et exported optionnels, 0 par défaut)
+            chunk_size: Nombre de pointages par transaction
+            skip_existing: Ignorer les pointages déjà présents (même employé, même timestamp)
+            defer_indexes: Supprimer les index secondaires pendant l'import
+            progress: Callback(nombre de pointages lus) appelé après chaque paquet
+        
+        Returns:
+            Nombre de pointages insérés
+        """
+        columns = "employee_id, employee_name, rfid, timestamp, type, synced, exported"
+        conn = self.get_connection()
+        
+        if skip_existing:
+            conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS import_staging ({columns})")
+            conn.execute("DELETE FROM import_staging")
+        
+        deferred = []
+        if defer_indexes:
+            deferred = conn.execute("""
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'index' AND tbl_name = 'pointages' AND sql IS NOT NULL
+                  AND name != 'idx_employee_timestamp'
+            """).fetchall()
+            for name, index_sql in deferred:
+                # Enregistré avec la suppression : recréé au démarrage si l'import est interrompu
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO deferred_indexes (name, sql) VALUES (?, ?)",
+                                 (name, index_sql))
+                    conn.execute(f"DROP INDEX IF EXISTS {name}")
+        
+        def write_chunk(chunk: List[Tuple]) -> int:
+            with conn:
+                if not skip_existing:
+                    return conn.executemany(
+                        f"INSERT INTO pointages ({columns}) VALUES (?, ?, ?, ?, ?, ?, ?)", chunk
+                    ).rowcount
+                conn.executemany(f"INSERT INTO import_staging ({columns}) VALUES (?, ?, ?, ?, ?, ?, ?)", chunk)
+                count = conn.execute(f"""
+                    INSERT INTO pointages ({columns})
+                    SELECT {columns} FROM import_staging s
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM {REPORTING_VIEW} p
+                        WHERE p.employee_id = s.employee_id AND p.timestamp = s.timestamp
+                    )
+                """).rowcount
+                conn.execute("DELETE FROM import_staging")
+                return count
+        
+        inserted = read = 0
+        earliest = {}
+        try:
+            chunk = []
+            for p in pointages:
+                employee_id, timestamp = p['employee_id'], p['timestamp']
+                chunk.append((employee_id, p['employee_name'], p['rfid'], timestamp, p['type'],
+                              p.get('synced', 0), p.get('exported', 0)))
+                current = earliest.get(employee_id)
+                if current is None or timestamp < current:
+                    earliest[employee_id] = timestamp
+                
+                if len(chunk) >= chunk_size:
+                    inserted += write_chunk(chunk)
+                    read += len(chunk)
+                    chunk = []
+                    if progress:
+                        progress(read)
+            if chunk:
+                inserted += write_chunk(chunk)
+                read += len(chunk)
+                if progress:
+                    progress(read)
+        finally:
+            # Reconstruire les index même si l'import est interrompu
+            if deferred:
+                self._restore_deferred_indexes(conn)
+            
+            if earliest:
+                with self._last_pointages_lock, conn:
+                    # Un seul recalcul, depuis le jour du pointage précédant le plus ancien importé
+                    timestamp = min(earliest.values())
+                    previous = conn.execute(
+                        f"SELECT MAX(timestamp) FROM {REPORTING_VIEW} WHERE timestamp < ?", (timestamp,)
+                    ).fetchone()[0]
+                    self._rebuild_daily_hours(conn, date.fromisoformat((previous or timestamp)[:10]))
+                self._load_last_pointages()
+        
+        logger.info(f"Import en masse: {inserted} pointage(s) insérés sur {read} lus")
+        return inserted
+    
+    def _refresh_last_pointages(self, conn: sqlite3.Connection, pointages: List[Dict]):
+        """Met à jour le cache des derniers pointages après une insertion par lot"""
+        latest = {}
+        for p in pointages:
+            current = latest.get(p['employee_id'])
+            if current is None or p['timestamp'] > current['timestamp']:
+                latest[p['employee_id']] = p
+        
+        with self._last_pointages_lock:
+            for employee_id, p in latest.items():
+                cached = self._last_pointages.get(employee_id)
+                if cached is not None and cached['timestamp'] > p['timestamp']:
+                    continue
+                row = conn.execute(
+                    "SELECT id FROM pointages WHERE employee_id = ? AND timestamp = ?",
+                    (employee_id, p['timestamp'])
+                ).fetchone()
+                self._last_pointages[employee_id] = {
+                    'id': row[0] if row else None,
+                    'employee_id': employee_id,
+                    'employee_name': p['employee_name'],
+                    'rfid': p['rfid'],
+                    'timestamp': p['timestamp'],
+                    'type': p['type']
+                }
+    
+    def _add_to_daily_hours(self, conn: sqlite3.Connection, employee_id: str, employee_name: str,
+                            timestamp: str, pointage_type: str):
+        """
+        Met à jour daily_hours pour un nouveau pointage (dans la transaction de l'insertion)
+        
+        Appelé avec _last_pointages_lock acquis, avant la mise à jour du cache : le pointage
+        en cache est le précédent. Une SORTIE qui suit une ENTREE ferme la période de travail,
+        comptée sur le jour de l'entrée.
+        """
+        day = timestamp[:10]
+        conn.execute(
+            "INSERT OR IGNORE INTO daily_hours (employee_id, day, employee_name) VALUES (?, ?, ?)",
+            (employee_id, day, employee_name)
+        )
+        conn.execute("""
+            UPDATE daily_hours SET num_pointages = num_pointages + 1, employee_name = ?
+            WHERE employee_id = ? AND day = ?
+        """, (employee_name, employee_id, day))
+        
+        previous = self._last_pointages.get(employee_id)
+        if pointage_type == 'SORTIE' and previous and previous['type'] == 'ENTREE':
+            hours = (datetime.fromisoformat(timestamp)
+                     - datetime.fromisoformat(previous['timestamp'])).total_seconds() / 3600
+            conn.execute("""
+                UPDATE daily_hours SET hours = hours + ?, num_pairs = num_pairs + 1
+                WHERE employee_id = ? AND day = ?
+            """, (hours, employee_id, previous['timestamp'][:10]))
+    
+    def _refresh_daily_hours(self, conn: sqlite3.Connection, pointages: List[Dict]):
+        """
+        Recalcule daily_hours après une insertion par lot (dans la même transaction)
+        
+        Les pointages d'un lot peuvent s'intercaler dans l'historique (import, rejeu du
+        journal) : pour chaque employé, les jours sont recalculés à partir de celui du
+        pointage qui précède le plus ancien du lot.
+        """
+        earliest = {}
+        for p in pointages:
+            current = earliest.get(p['employee_id'])
+            if current is None or p['timestamp'] < current:
+                earliest[p['employee_id']] = p['timestamp']
+        
+        for employee_id, timestamp in earliest.items():
+            previous = conn.execute(
+                f"SELECT MAX(timestamp) FROM {REPORTING_VIEW} WHERE employee_id = ? AND timestamp < ?",
+                (employee_id, timestamp)
+            ).fetchone()[0]
+            since_day = date.fromisoformat((previous or timestamp)[:10])
+            self._rebuild_daily_hours(conn, since_day, employee_id)
+    
+    def rebuild_daily_hours(self, since_day: Optional[date] = None) -> int:
+        """
+        Recalcule la table de synthèse daily_hours depuis les pointages bruts
+        
+        Args:
+            since_day: Premier jour recalculé (None = tout l'historique)
+        
+        Returns:
+            Nombre de lignes (employé, jour) écrites
+        """
+        conn = self.get_connection()
+        started = time.perf_counter()
+        # Verrou : aucun pointage ne s'insère (mise à jour incrémentale) pendant le recalcul
+        with self._last_pointages_lock, conn:
+            written = self._rebuild_daily_hours(conn, since_day)
+        logger.info(f"Synthèse daily_hours recalculée: {written} ligne(s) en "
+                    f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        return written
+    
+    def _rebuild_daily_hours(self, conn: sqlite3.Connection, since_day: Optional[date],
+                             employee_id: Optional[str] = None) -> int:
+        """Remplace les lignes de daily_hours à partir de since_day (sans gérer la transaction)"""
+        conditions, params = [], []
+        if since_day is not None:
+            conditions.append("day >= ?")
+            params.append(since_day.isoformat())
+        if employee_id is not None:
+            conditions.append("employee_id = ?")
+            params.append(employee_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        conn.execute(f"DELETE FROM daily_hours {where}", params)
+        
+        rows = self._hours_by_day(since_day, None, employee_id)
+        conn.executemany("""
+            INSERT INTO daily_hours (employee_id, employee_name, day, hours, num_pairs, num_pointages)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        return len(rows)
+    
     def add_pointage(self, employee_id: str, employee_name: str, rfid: str, pointage_type: str) -> int:
         """
         Ajoute un pointage
@@ -77,28 +608,50 @@ class DatabaseManager:
             pointage_type: Type de pointage ('ENTREE' ou 'SORTIE')
         
         Returns:
-            ID du pointage créé
+            ID du pointage créé (None si l'écriture groupée est active : inséré au prochain lot)
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        timestamp = datetime.now()
+        with self._last_pointages_lock:
+            return self._insert_pointage(employee_id, employee_name, rfid, pointage_type)
+    
+    def record_pointage(self, employee_id: str, employee_name: str, rfid: str,
+                        min_interval: float = 0) -> Tuple[Optional[int], Optional[str], float]:
+        """
+        Détermine le type (ENTREE/SORTIE) et enregistre le pointage en une seule opération
         
-        cursor.execute("""
-            INSERT INTO pointages (employee_id, employee_name, rfid, timestamp, type)
-            VALUES (?, ?, ?, ?, ?)
-        """, (employee_id, employee_name, rfid, timestamp, pointage_type))
+        La décision se base sur le cache des derniers pointages (aucune lecture en base) et
+        se fait sous verrou avec l'insertion : deux badges simultanés ne peuvent pas produire
+        deux ENTREE consécutives.
         
-        pointage_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        Args:
+            employee_id: ID de l'employé
+            employee_name: Nom de l'employé
+            rfid: Code RFID
+            min_interval: Délai minimum (secondes) entre deux pointages du même employé
         
-        logger.info(f"Pointage ajouté: {employee_name} - {pointage_type} - {timestamp}")
-        return pointage_id
+        Returns:
+            (id, type, 0) si le pointage est enregistré (id None en écriture groupée)
+            (None, None, secondes_restantes) si le délai minimum n'est pas écoulé
+        """
+        with self._last_pointages_lock:
+            last_pointage = self._last_pointages.get(employee_id)
+            
+            if last_pointage and min_interval > 0:
+                last_timestamp = datetime.fromisoformat(last_pointage['timestamp'])
+                elapsed = (datetime.now() - last_timestamp).total_seconds()
+                if elapsed < min_interval:
+                    return None, None, min_interval - elapsed
+            
+            if last_pointage and last_pointage['type'] == 'ENTREE':
+                pointage_type = 'SORTIE'
+            else:
+                pointage_type = 'ENTREE'
+            
+            pointage_id = self._insert_pointage(employee_id, employee_name, rfid, pointage_type)
+            return pointage_id, pointage_type, 0
     
     def get_last_pointage(self, employee_id: str) -> Optional[Dict]:
         """
-        Récupère le dernier pointage d'un employé
+        Récupère le dernier pointage d'un employé (depuis le cache mémoire)
         
         Args:
             employee_id: ID de l'employé
@@ -106,185 +659,499 @@ class DatabaseManager:
         Returns:
             Dictionnaire avec les infos du pointage ou None
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self._last_pointages_lock:
+            last_pointage = self._last_pointages.get(employee_id)
+            return dict(last_pointage) if last_pointage else None
+    
+    def get_pointages_by_date(self, start_date: date, end_date: date,
+                              as_rows: bool = False) -> List[Union[Dict, PointageRow]]:
+        """
+        Récupère tous les pointages entre deux dates (archives mensuelles comprises)
         
-        cursor.execute("""
-            SELECT id, employee_id, employee_name, rfid, timestamp, type
-            FROM pointages
-            WHERE employee_id = ?
-            ORDER BY timestamp DESC
-            LIMIT 1
-        """, (employee_id,))
+        Args:
+            start_date: Date de début
+            end_date: Date de fin
+            as_rows: Retourner des PointageRow (tuples nommés) au lieu de dictionnaires
         
-        row = cursor.fetchone()
-        conn.close()
+        Returns:
+            Liste de dictionnaires (ou de PointageRow) avec les pointages
+        """
+        conn = self.get_connection()
         
-        if row:
-            return {
-                'id': row[0],
-                'employee_id': row[1],
-                'employee_name': row[2],
-                'rfid': row[3],
-                'timestamp': row[4],
-                'type': row[5]
-            }
-        return None
+        # Intervalle semi-ouvert [début, fin + 1 jour[ sur la colonne brute : utilise idx_timestamp
+        # (DATE(timestamp) BETWEEN ... forçait un parcours complet de la table)
+        cursor = conn.execute(f"""
+            SELECT {POINTAGE_COLUMNS}
+            FROM {REPORTING_VIEW}
+            WHERE timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp
+        """, self._date_range_bounds(start_date, end_date))
+        
+        return self._fetch_pointages(cursor, as_rows)
     
-    def get_pointages_by_date(self, start_date: date, end_date: date) -> List[Dict]:
+    @staticmethod
+    def _fetch_pointages(cursor: sqlite3.Cursor, as_rows: bool) -> List[Union[Dict, PointageRow]]:
+        """Lit toutes les lignes d'une requête sur POINTAGE_COLUMNS"""
+        rows = cursor.fetchall()
+        if as_rows:
+            return list(map(PointageRow._make, rows))
+        return [dict(zip(PointageRow._fields, row)) for row in rows]
+    
+    def iter_pointages_by_date(self, start_date: date, end_date: date, as_rows: bool = False,
+                               chunk_size: int = SQLITE_FETCH_CHUNK) -> Iterator[Union[Dict, PointageRow]]:
         """
-        Récupère tous les pointages entre deux dates
+        Parcourt les pointages entre deux dates (archives comprises) sans les charger tous en mémoire
         
         Args:
             start_date: Date de début
             end_date: Date de fin
+            as_rows: Produire des PointageRow (tuples nommés) au lieu de dictionnaires
+            chunk_size: Nombre de lignes lues par paquet
+        """
+        cursor = self.get_connection().execute(f"""
+            SELECT {POINTAGE_COLUMNS}
+            FROM {REPORTING_VIEW}
+            WHERE timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp
+        """, self._date_range_bounds(start_date, end_date))
+        
+        return self._iter_pointages(cursor, as_rows, chunk_size)
+    
+    def iter_non_exported(self, as_rows: bool = False,
+                          chunk_size: int = SQLITE_FETCH_CHUNK) -> Iterator[Union[Dict, PointageRow]]:
+        """Parcourt les pointages non exportés par paquets (voir iter_pointages_by_date)"""
+        cursor = self.get_connection().execute(f"""
+            SELECT {POINTAGE_COLUMNS}
+            FROM pointages
+            WHERE exported = 0
+            ORDER BY timestamp
+        """)
+        
+        return self._iter_pointages(cursor, as_rows, chunk_size)
+    
+    @staticmethod
+    def _iter_pointages(cursor: sqlite3.Cursor, as_rows: bool,
+                        chunk_size: int) -> Iterator[Union[Dict, PointageRow]]:
+        """Produit les lignes d'une requête sur POINTAGE_COLUMNS, chunk_size lignes à la fois"""
+        cursor.arraysize = chunk_size
+        try:
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                if as_rows:
+                    yield from map(PointageRow._make, rows)
+                else:
+                    for row in rows:
+                        yield dict(zip(PointageRow._fields, row))
+        finally:
+            cursor.close()
+    
+    def count_non_exported_pointages(self) -> int:
+        """Nombre de pointages en attente d'export"""
+        return self.get_connection().execute(
+            "SELECT COUNT(*) FROM pointages WHERE exported = 0"
+        ).fetchone()[0]
+    
+    def get_terminal_id(self) -> str:
+        """Identifiant unique de cette base, généré à sa création (voir sync_key)"""
+        if self._terminal_id is None:
+            self._terminal_id = self.get_connection().execute(
+                "SELECT value FROM terminal_info WHERE key = 'terminal_id'"
+            ).fetchone()[0]
+        return self._terminal_id
+    
+    def sync_key(self, pointage_id: int) -> str:
+        """
+        Clé d'idempotence d'un pointage, stable d'un envoi à l'autre
+        
+        Un pointage renvoyé (arrêt entre la réponse de l'API et mark_as_synced, nouvelle
+        tentative après une erreur réseau) porte la même clé : le serveur peut écarter le doublon.
+        """
+        return f"{self.get_terminal_id()}-{pointage_id}"
+    
+    def iter_sync_due(self, as_rows: bool = False,
+                      chunk_size: int = SQLITE_FETCH_CHUNK) -> Iterator[Union[Dict, PointageRow]]:
+        """
+        Parcourt les pointages à envoyer à l'API maintenant (voir SYNC_DUE_QUERY)
+        
+        Seule la file sync_outbox est lue : les pointages en attente d'une nouvelle
+        tentative et ceux mis à l'écart ne sont pas relus à chaque cycle.
+        """
+        cursor = self.get_connection().execute(SYNC_DUE_QUERY, {'now': time.time()})
+        return self._iter_pointages(cursor, as_rows, chunk_size)
+    
+    def count_sync_due(self) -> int:
+        """Nombre de pointages à envoyer à l'API maintenant"""
+        return self.get_connection().execute(
+            f"SELECT COUNT(*) FROM ({SYNC_DUE_QUERY})", {'now': time.time()}
+        ).fetchone()[0]
+    
+    def record_sync_failures(self, failures: Iterable[Tuple[int, str]],
+                             retry_base: float = SYNC_RETRY_BASE, retry_max: float = SYNC_RETRY_MAX,
+                             max_attempts: int = SYNC_MAX_ATTEMPTS) -> int:
+        """
+        Enregistre des pointages refusés par l'API et planifie leur prochaine tentative
+        
+        Le délai double à chaque refus (retry_base, 2 × retry_base, ... jusqu'à retry_max) ;
+        après max_attempts refus, le pointage est mis à l'écart (dead letter) et n'est plus
+        envoyé (voir requeue_dead_letters).
+        
+        Args:
+            failures: Couples (ID du pointage, motif du refus)
+            retry_base: Délai avant la deuxième tentative (secondes)
+            retry_max: Délai maximum entre deux tentatives (secondes)
+            max_attempts: Nombre de tentatives avant mise à l'écart
         
         Returns:
-            Liste de dictionnaires avec les pointages
+            Nombre de pointages mis à l'écart par cet appel
         """
         conn = self.get_connection()
-        cursor = conn.cursor()
+        now = time.time()
+        dead = []
+        with conn:
+            for pointage_id, error in failures:
+                updated = conn.execute("""
+                    UPDATE sync_outbox
+                    SET attempts = attempts + 1,
+                        next_attempt_at = :now + MIN(:retry_max, :retry_base * (1 << MIN(attempts, 30))),
+                        last_error = :error,
+                        dead = (attempts + 1 >= :max_attempts)
+                    WHERE pointage_id = :id AND dead = 0
+                """, {'id': pointage_id, 'error': error, 'now': now, 'retry_base': retry_base,
+                      'retry_max': retry_max, 'max_attempts': max_attempts}).rowcount
+                if updated and conn.execute(
+                    "SELECT dead FROM sync_outbox WHERE pointage_id = ?", (pointage_id,)
+                ).fetchone()[0]:
+                    dead.append(pointage_id)
         
-        cursor.execute("""
-            SELECT id, employee_id, employee_name, rfid, timestamp, type, exported, synced
-            FROM pointages
-            WHERE DATE(timestamp) BETWEEN ? AND ?
-            ORDER BY timestamp
-        """, (start_date, end_date))
+        if dead:
+            logger.warning(f"{len(dead)} pointage(s) mis à l'écart après {max_attempts} refus de l'API: {dead}")
+        return len(dead)
+    
+    def get_dead_letters(self) -> List[Dict]:
+        """
+        Pointages mis à l'écart après trop de refus de l'API
         
-        rows = cursor.fetchall()
-        conn.close()
+        Returns:
+            Liste de dictionnaires (champs du pointage, attempts et last_error)
+        """
+        cursor = self.get_connection().execute(f"""
+            SELECT {POINTAGE_COLUMNS}, o.attempts, o.last_error
+            FROM sync_outbox o CROSS JOIN pointages p ON p.id = o.pointage_id
+            WHERE o.dead = 1
+            ORDER BY p.timestamp
+        """)
+        fields = PointageRow._fields + ('attempts', 'last_error')
+        return [dict(zip(fields, row)) for row in cursor]
+    
+    def requeue_dead_letters(self) -> int:
+        """
+        Remet dans la file d'envoi les pointages mis à l'écart (après correction côté serveur)
         
-        pointages = []
-        for row in rows:
-            pointages.append({
-                'id': row[0],
-                'employee_id': row[1],
-                'employee_name': row[2],
-                'rfid': row[3],
-                'timestamp': row[4],
-                'type': row[5],
-                'exported': row[6],
-                'synced': row[7]
-            })
+        Returns:
+            Nombre de pointages remis en file
+        """
+        conn = self.get_connection()
+        with conn:
+            requeued = conn.execute("""
+                UPDATE sync_outbox
+                SET attempts = 0, next_attempt_at = 0, dead = 0
+                WHERE dead = 1
+            """).rowcount
+        if requeued:
+            logger.info(f"{requeued} pointage(s) remis dans la file de synchronisation")
+        return requeued
+    
+    @staticmethod
+    def _date_range_bounds(start_date: date, end_date: date) -> tuple:
+        """
+        Convertit une période de dates (bornes incluses) en bornes de timestamp semi-ouvertes
         
-        return pointages
+        Les timestamps sont stockés au format ISO ('AAAA-MM-JJ HH:MM:SS...'), la comparaison
+        de chaînes respecte donc l'ordre chronologique.
+        """
+        return start_date.isoformat(), (end_date + timedelta(days=1)).isoformat()
     
-    def get_non_exported_pointages(self) -> List[Dict]:
+    def get_non_exported_pointages(self, as_rows: bool = False) -> List[Union[Dict, PointageRow]]:
         """
         Récupère tous les pointages non exportés
         
+        Args:
+            as_rows: Retourner des PointageRow (tuples nommés) au lieu de dictionnaires
+        
         Returns:
-            Liste de dictionnaires avec les pointages
+            Liste de dictionnaires (ou de PointageRow) avec les pointages
         """
         conn = self.get_connection()
-        cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT id, employee_id, employee_name, rfid, timestamp, type
+        cursor = conn.execute(f"""
+            SELECT {POINTAGE_COLUMNS}
             FROM pointages
             WHERE exported = 0
             ORDER BY timestamp
         """)
         
-        rows = cursor.fetchall()
-        conn.close()
-        
-        pointages = []
-        for row in rows:
-            pointages.append({
-                'id': row[0],
-                'employee_id': row[1],
-                'employee_name': row[2],
-                'rfid': row[3],
-                'timestamp': row[4],
-                'type': row[5]
-            })
-        
-        return pointages
+        return self._fetch_pointages(cursor, as_rows)
     
-    def mark_as_exported(self, pointage_ids: List[int]):
+    def mark_as_exported(self, pointage_ids: Iterable[int]) -> int:
         """
         Marque des pointages comme exportés
         
         Args:
-            pointage_ids: Liste des IDs de pointages à marquer
+            pointage_ids: IDs des pointages à marquer (liste ou itérable, sans limite de taille)
+        
+        Returns:
+            Nombre de pointages effectivement passés à l'état exporté
         """
-        if not pointage_ids:
-            return
+        updated = self._set_flag('exported', pointage_ids)
+        if updated:
+            logger.info(f"{updated} pointages marqués comme exportés")
+        return updated
+    
+    def _set_flag(self, column: str, pointage_ids: Iterable[int], chunk_size: int = SQLITE_IN_CHUNK) -> int:
+        """
+        Passe la colonne 'exported' ou 'synced' à 1 pour les IDs donnés
+        
+        Les IDs sont traités par paquets de chunk_size (jamais de 'too many SQL variables'),
+        tous dans une seule transaction : un seul commit quel que soit le volume.
+        Les lignes déjà à 1 ne sont pas réécrites.
+        """
+        if column not in ('exported', 'synced'):
+            raise ValueError(f"Colonne d'état inconnue: {column}")
+        
+        ids = list(pointage_ids)
+        if not ids:
+            return 0
         
         conn = self.get_connection()
-        cursor = conn.cursor()
+        updated = 0
+        with conn:
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                placeholders = ','.join('?' * len(chunk))
+                cursor = conn.execute(f"""
+                    UPDATE pointages
+                    SET {column} = 1
+                    WHERE id IN ({placeholders}) AND {column} = 0
+                """, chunk)
+                updated += cursor.rowcount
         
-        placeholders = ','.join(['?'] * len(pointage_ids))
-        cursor.execute(f"""
-            UPDATE pointages
-            SET exported = 1
-            WHERE id IN ({placeholders})
-        """, pointage_ids)
+        return updated
+    
+    def mark_as_synced(self, pointage_ids: Iterable[int]) -> int:
+        """
+        Marque des pointages comme synchronisés avec l'API
         
-        conn.commit()
-        conn.close()
+        Args:
+            pointage_ids: IDs des pointages à marquer (liste ou itérable, sans limite de taille)
         
-        logger.info(f"{len(pointage_ids)} pointages marqués comme exportés")
+        Returns:
+            Nombre de pointages effectivement passés à l'état synchronisé
+        """
+        updated = self._set_flag('synced', pointage_ids)
+        if updated:
+            logger.info(f"{updated} pointages marqués comme synchronisés")
+        return updated
     
-    def get_unsynced_pointages(self) -> List[Dict]:
+    def archive_old_pointages(self, retention_days: int, max_months: Optional[int] = None) -> int:
         """
-        Récupère tous les pointages non synchronisés avec l'API
+        Déplace les anciens pointages vers des tables d'archive mensuelles
+        
+        Seuls les pointages plus vieux que retention_days, déjà synchronisés et exportés sont
+        archivés : les files d'export et de synchronisation ne lisent que la table principale.
+        Le dernier pointage de chaque employé y reste aussi (calcul ENTREE/SORTIE au
+        redémarrage). La table 'pointages' reste ainsi petite ; les rapports lisent la vue
+        'pointages_all' qui réunit toutes les tables.
+        
+        Chaque mois est déplacé dans sa propre transaction : les enregistrements de badges
+        passent entre deux mois au lieu d'attendre la fin d'un premier archivage de plusieurs
+        années.
+        
+        Args:
+            retention_days: Nombre de jours conservés dans la table principale (0 = désactivé)
+            max_months: Nombre maximum de mois déplacés par appel (None = tous, du plus ancien
+                au plus récent)
         
         Returns:
-            Liste de dictionnaires avec les pointages
+            Nombre de pointages archivés
         """
+        if retention_days <= 0:
+            return 0
+        
+        cutoff = (date.today() - timedelta(days=retention_days)).isoformat()
+        condition = ("timestamp < ? AND synced = 1 AND exported = 1"
+                     " AND id NOT IN (SELECT id FROM archive_keep_ids)")
+        
+        # Les pointages plus récents que ces derniers pointages ne sont pas archivables
+        # (postérieurs au seuil) : le verrou n'est tenu que le temps de la copie
+        with self._last_pointages_lock:
+            keep_ids = [p['id'] for p in self._last_pointages.values() if p['id'] is not None]
+        
         conn = self.get_connection()
-        cursor = conn.cursor()
+        with conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_keep_ids (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM archive_keep_ids")
+            conn.executemany("INSERT INTO archive_keep_ids (id) VALUES (?)", ((i,) for i in keep_ids))
         
-        cursor.execute("""
-            SELECT id, employee_id, employee_name, rfid, timestamp, type
+        months = [row[0] for row in conn.execute(f"""
+            SELECT DISTINCT substr(timestamp, 1, 7)
             FROM pointages
-            WHERE synced = 0
-            ORDER BY timestamp
-        """)
+            WHERE {condition}
+            ORDER BY 1
+        """, (cutoff,))]
+        if max_months is not None:
+            months = months[:max_months]
         
-        rows = cursor.fetchall()
-        conn.close()
+        archived = 0
+        for month in months:
+            month_start = f"{month}-01"
+            year, month_num = int(month[:4]), int(month[5:7])
+            next_month = date(year + month_num // 12, month_num % 12 + 1, 1).isoformat()
+            month_condition = f"{condition} AND timestamp >= ? AND timestamp < ?"
+            params = (cutoff, month_start, next_month)
+            
+            with conn:
+                table = self._create_archive_table(conn, month)
+                conn.execute(f"""
+                    INSERT INTO {table} ({ARCHIVE_COLUMNS})
+                    SELECT {ARCHIVE_COLUMNS} FROM pointages
+                    WHERE {month_condition}
+                """, params)
+                archived += conn.execute(f"DELETE FROM pointages WHERE {month_condition}", params).rowcount
+                self._create_reporting_view(conn, replace=True)
         
-        pointages = []
-        for row in rows:
-            pointages.append({
-                'id': row[0],
-                'employee_id': row[1],
-                'employee_name': row[2],
-                'rfid': row[3],
-                'timestamp': row[4],
-                'type': row[5]
-            })
+        if archived:
+            logger.info(f"Archivage: {archived} pointage(s) antérieurs au {cutoff} déplacés ({len(months)} mois)")
+        return archived
+    
+    @staticmethod
+    def _create_archive_table(conn: sqlite3.Connection, month: str) -> str:
+        """Crée si besoin la table d'archive du mois 'AAAA-MM' et retourne son nom"""
+        table = f"{ARCHIVE_TABLE_PREFIX}{month[:4]}{month[5:7]}"
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                employee_id TEXT NOT NULL,
+                employee_name TEXT NOT NULL,
+                rfid TEXT NOT NULL,
+                timestamp DATETIME NOT NULL,
+                type TEXT NOT NULL,
+                exported INTEGER DEFAULT 0,
+                synced INTEGER DEFAULT 0,
+                created_at DATETIME
+            )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table}(timestamp)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_employee ON {table}(employee_id, timestamp)")
+        return table
+    
+    @staticmethod
+    def _create_reporting_view(conn: sqlite3.Connection, replace: bool):
+        """(Re)crée la vue 'pointages_all' : table principale + toutes les archives mensuelles"""
+        if replace:
+            conn.execute(f"DROP VIEW IF EXISTS {REPORTING_VIEW}")
         
-        return pointages
+        archive_tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ORDER BY name",
+            (ARCHIVE_TABLE_PREFIX + '%',)
+        )]
+        selects = [f"SELECT {POINTAGE_COLUMNS} FROM {table}" for table in ['pointages'] + archive_tables]
+        conn.execute(f"CREATE VIEW IF NOT EXISTS {REPORTING_VIEW} AS " + " UNION ALL ".join(selects))
     
-    def mark_as_synced(self, pointage_ids: List[int]):
+    def checkpoint(self) -> Tuple[int, int, int]:
         """
-        Marque des pointages comme synchronisés avec l'API
+        Reporte le journal WAL dans la base sans bloquer lecteurs ni écrivains (mode PASSIVE)
+        
+        Returns:
+            (busy, pages_dans_le_wal, pages_reportées) tel que renvoyé par SQLite
+        """
+        return tuple(self.get_connection().execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone())
+    
+    def run_maintenance(self, vacuum_pages: int = SQLITE_VACUUM_PAGES) -> Dict[str, float]:
+        """
+        Maintenance de la base : statistiques du planificateur, VACUUM incrémental, checkpoint
+        
+        Prévue pour les périodes creuses (nuit, aucun badge présent). Une base créée avant
+        le VACUUM incrémental n'est pas convertie ici : le VACUUM complet réécrirait tout le
+        fichier en bloquant les pointages (voir enable_incremental_vacuum.py).
         
         Args:
-            pointage_ids: Liste des IDs de pointages à marquer
+            vacuum_pages: Nombre maximum de pages libres rendues au système de fichiers
+        
+        Returns:
+            Durée de chaque étape en millisecondes
         """
-        if not pointage_ids:
-            return
+        conn = self.get_connection()
+        timings = {}
+        
+        started = time.perf_counter()
+        has_stats = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone()
+        # PRAGMA optimize ne lance ANALYZE que si utile ; premier passage : ANALYZE complet
+        conn.execute("PRAGMA optimize" if has_stats else "ANALYZE")
+        conn.commit()
+        timings['optimize'] = (time.perf_counter() - started) * 1000
+        
+        started = time.perf_counter()
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            logger.info("VACUUM incrémental inactif sur cette base (voir enable_incremental_vacuum.py)")
+            freelist = 0
+        if freelist:
+            # executescript exécute la pragma jusqu'au bout (execute() ne libère qu'une page)
+            conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+        timings['vacuum'] = (time.perf_counter() - started) * 1000
+        
+        started = time.perf_counter()
+        busy, wal_pages, checkpointed = self.checkpoint()
+        timings['checkpoint'] = (time.perf_counter() - started) * 1000
         
+        logger.info(
+            f"Maintenance base: optimize {timings['optimize']:.0f} ms, "
+            f"vacuum {timings['vacuum']:.0f} ms ({min(freelist, vacuum_pages)} page(s) libérée(s)), "
+            f"checkpoint {timings['checkpoint']:.0f} ms ({checkpointed}/{wal_pages} pages)"
+        )
+        return timings
+    
+    def enable_incremental_vacuum(self, progress: Optional[Callable[[float], None]] = None) -> bool:
+        """
+        Convertit une base existante au VACUUM incrémental (VACUUM complet, une seule fois)
+        
+        Réécrit tout le fichier en tenant le verrou d'écriture : à lancer application arrêtée
+        (voir enable_incremental_vacuum.py), jamais depuis la maintenance automatique.
+        
+        Args:
+            progress: Callback(secondes écoulées) appelé environ toutes les secondes
+        
+        Returns:
+            True si la base a été convertie, False si elle l'était déjà
+        """
         conn = self.get_connection()
-        cursor = conn.cursor()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+            return False
         
-        placeholders = ','.join(['?'] * len(pointage_ids))
-        cursor.execute(f"""
-            UPDATE pointages
-            SET synced = 1
-            WHERE id IN ({placeholders})
-        """, pointage_ids)
+        started = last_report = time.perf_counter()
         
-        conn.commit()
-        conn.close()
+        def report():
+            nonlocal last_report
+            now = time.perf_counter()
+            if now - last_report >= 1:
+                last_report = now
+                progress(now - started)
+            return 0
         
-        logger.info(f"{len(pointage_ids)} pointages marqués comme synchronisés")
+        if progress:
+            conn.set_progress_handler(report, 10000)
+        try:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        finally:
+            conn.set_progress_handler(None, 0)
+        
+        logger.info(f"Base convertie au VACUUM incrémental en {time.perf_counter() - started:.1f} s")
+        return True
     
     def get_employee_hours(self, employee_id: str, start_date: date, end_date: date) -> Dict:
         """
@@ -298,32 +1165,154 @@ class DatabaseManager:
         Returns:
             Dictionnaire avec les statistiques
         """
-        pointages = self.get_pointages_by_date(start_date, end_date)
-        pointages = [p for p in pointages if p['employee_id'] == employee_id]
-        
-        total_hours = 0
-        days = {}
-        
-        for i in range(0, len(pointages) - 1, 2):
-            if pointages[i]['type'] == 'ENTREE' and i + 1 < len(pointages):
-                if pointages[i + 1]['type'] == 'SORTIE':
-                    entry_time = datetime.fromisoformat(pointages[i]['timestamp'])
-                    exit_time = datetime.fromisoformat(pointages[i + 1]['timestamp'])
-                    duration = (exit_time - entry_time).total_seconds() / 3600
-                    total_hours += duration
-                    
-                    day_key = entry_time.date()
-                    if day_key not in days:
-                        days[day_key] = 0
-                    days[day_key] += duration
-        
+        hours = self.get_all_employees_hours(start_date, end_date, employee_id=employee_id)
+        if employee_id in hours:
+            return hours[employee_id]
         return {
             'employee_id': employee_id,
-            'total_hours': round(total_hours, 2),
-            'days': days,
-            'num_pointages': len(pointages)
+            'employee_name': None,
+            'total_hours': 0,
+            'days': {},
+            'num_pointages': 0
         }
-
-
-
-
+    
+    def get_all_employees_hours(self, start_date: date, end_date: date,
+                                employee_id: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Heures travaillées de tous les employés, lues dans la synthèse daily_hours
+        
+        Chaque ENTREE immédiatement suivie d'une SORTIE (même employé) forme une période
+        de travail, comptée sur le jour de l'entrée (même si la sortie tombe après end_date).
+        
+        Args:
+            start_date: Date de début
+            end_date: Date de fin
+            employee_id: Limiter le calcul à un employé (optionnel)
+        
+        Returns:
+            Dictionnaire {employee_id: statistiques}, statistiques au format de get_employee_hours
+        """
+        params = [start_date.isoformat(), end_date.isoformat()]
+        employee_filter = ""
+        if employee_id is not None:
+            employee_filter = "AND employee_id = ?"
+            params.append(employee_id)
+        
+        conn = self.get_connection()
+        rows = conn.execute(f"""
+            SELECT employee_id, employee_name, day, hours, num_pairs, num_pointages
+            FROM daily_hours
+            WHERE day >= ? AND day <= ? {employee_filter}
+            ORDER BY employee_id, day
+        """, params).fetchall()
+        
+        results = {}
+        for emp_id, employee_name, day, hours, num_pairs, num_pointages in rows:
+            stats = results.get(emp_id)
+            if stats is None:
+                stats = results[emp_id] = {
+                    'employee_id': emp_id,
+                    'employee_name': employee_name,
+                    'total_hours': 0,
+                    'days': {},
+                    'num_pointages': 0
+                }
+            stats['num_pointages'] += num_pointages
+            if num_pairs:
+                stats['total_hours'] += hours
+                stats['days'][date.fromisoformat(day)] = hours
+        
+        for stats in results.values():
+            stats['total_hours'] = round(stats['total_hours'], 2)
+        
+        return results
+    
+    def _hours_by_day(self, start_date: Optional[date], end_date: Optional[date],
+                      employee_id: Optional[str]) -> List[Tuple]:
+        """
+        Calcule les heures par employé et par jour depuis les pointages bruts
+        
+        Returns:
+            Tuples (employee_id, employee_name, jour, heures, nb_paires, nb_pointages)
+        """
+        if WINDOW_FUNCTIONS_AVAILABLE:
+            return self._hours_by_day_sql(start_date, end_date, employee_id)
+        return self._hours_by_day_python(start_date, end_date, employee_id)
+    
+    @staticmethod
+    def _hours_filter(start_date: Optional[date], end_date: Optional[date],
+                      employee_id: Optional[str]) -> Tuple[str, List]:
+        """Conditions (période, employé) du calcul des heures ; une date None = pas de borne"""
+        conditions, params = [], []
+        if start_date is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start_date.isoformat())
+        if end_date is not None:
+            conditions.append("timestamp < ?")
+            params.append((end_date + timedelta(days=1)).isoformat())
+        if employee_id is not None:
+            conditions.append("employee_id = ?")
+            params.append(employee_id)
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+    
+    def _hours_by_day_sql(self, start_date: Optional[date], end_date: Optional[date],
+                          employee_id: Optional[str]) -> List[Tuple]:
+        """Heures par employé et par jour, appariement ENTREE/SORTIE fait par SQLite (LEAD)"""
+        where, params = self._hours_filter(start_date, end_date, employee_id)
+        
+        conn = self.get_connection()
+        cursor = conn.execute(f"""
+            WITH ordered AS (
+                SELECT employee_id, employee_name, timestamp, type,
+                       LEAD(type) OVER w AS next_type,
+                       LEAD(timestamp) OVER w AS next_timestamp
+                FROM {REPORTING_VIEW}
+                {where}
+                WINDOW w AS (PARTITION BY employee_id ORDER BY timestamp)
+            ),
+            paired AS (
+                SELECT employee_id, employee_name, DATE(timestamp) AS day,
+                       CASE WHEN type = 'ENTREE' AND next_type = 'SORTIE'
+                            THEN (julianday(next_timestamp) - julianday(timestamp)) * 24
+                       END AS hours
+                FROM ordered
+            )
+            SELECT employee_id, MAX(employee_name), day,
+                   COALESCE(SUM(hours), 0), COUNT(hours), COUNT(*)
+            FROM paired
+            GROUP BY employee_id, day
+            ORDER BY employee_id, day
+        """, params)
+        return cursor.fetchall()
+    
+    def _hours_by_day_python(self, start_date: Optional[date], end_date: Optional[date],
+                             employee_id: Optional[str]) -> List[Tuple]:
+        """Même calcul que _hours_by_day_sql en un seul parcours des lignes triées (SQLite < 3.25)"""
+        where, params = self._hours_filter(start_date, end_date, employee_id)
+        
+        conn = self.get_connection()
+        cursor = conn.execute(f"""
+            SELECT employee_id, employee_name, timestamp, type
+            FROM {REPORTING_VIEW}
+            {where}
+            ORDER BY employee_id, timestamp
+        """, params)
+        
+        # {(employee_id, jour): [nom, heures, nb_paires, nb_pointages]}
+        days = {}
+        previous = None
+        for emp_id, employee_name, timestamp, pointage_type in cursor:
+            day_stats = days.setdefault((emp_id, timestamp[:10]), [employee_name, 0.0, 0, 0])
+            day_stats[3] += 1
+            
+            if (previous is not None and previous[0] == emp_id
+                    and previous[2] == 'ENTREE' and pointage_type == 'SORTIE'):
+                entry_time = datetime.fromisoformat(previous[1])
+                exit_time = datetime.fromisoformat(timestamp)
+                entry_stats = days[(emp_id, previous[1][:10])]
+                entry_stats[1] += (exit_time - entry_time).total_seconds() / 3600
+                entry_stats[2] += 1
+            previous = (emp_id, timestamp, pointage_type)
+        
+        return [(emp_id, name, day, hours, num_pairs, num_pointages)
+                for (emp_id, day), (name, hours, num_pairs, num_pointages) in days.items()]
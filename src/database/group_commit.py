@@ -0,0 +1,151 @@
+"""
+Écriture groupée des pointages (group commit) avec journal d'écriture anticipée
+
+Chaque pointage est d'abord ajouté à un fichier journal (une ligne JSON, fsync) : il est
+alors durable et le badge peut être acquitté immédiatement. Un thread d'arrière-plan
+insère ensuite les pointages en attente dans SQLite par lots, en une transaction par lot.
+Au démarrage, les journaux restants (arrêt brutal, coupure de courant) sont rejoués.
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitWriter:
+    """Journalise les pointages puis les insère par lots dans SQLite"""
+
+    def __init__(self, db_manager, journal_path: Path, flush_interval_ms: int = 200, fsync: bool = True):
+        """
+        Args:
+            db_manager: DatabaseManager cible
+            journal_path: Fichier journal (ajout seul)
+            flush_interval_ms: Intervalle entre deux écritures groupées dans SQLite
+            fsync: Forcer l'écriture du journal sur disque à chaque pointage
+        """
+        self.db_manager = db_manager
+        self.journal_path = Path(journal_path)
+        # Journal en cours d'insertion : supprimé seulement après le commit SQLite
+        self.flushing_path = self.journal_path.with_name(self.journal_path.name + '.flushing')
+        self.flush_interval = flush_interval_ms / 1000
+        self.fsync = fsync
+
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()        # journal + file d'attente
+        self._flush_lock = threading.Lock()  # une seule écriture groupée à la fois
+        self._stop_event = threading.Event()
+        self._journal = None
+        self._thread = None
+
+    def start(self):
+        """Rejoue les journaux existants puis démarre le thread d'écriture"""
+        self.replay()
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="GroupCommitWriter", daemon=True)
+        self._thread.start()
+        logger.info(f"Écriture groupée activée (toutes les {int(self.flush_interval * 1000)} ms)")
+
+    def stop(self):
+        """Arrête le thread et écrit les pointages encore en attente"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    def submit(self, pointage: Dict):
+        """
+        Journalise un pointage ; il sera inséré dans SQLite au prochain lot
+
+        Args:
+            pointage: Dictionnaire avec employee_id, employee_name, rfid, timestamp, type
+        """
+        line = json.dumps(pointage, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._journal.write(line)
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._pending.append(pointage)
+
+    def pending_count(self) -> int:
+        """Nombre de pointages journalisés pas encore insérés dans SQLite"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Insère dans SQLite tous les pointages en attente (une transaction)
+
+        Returns:
+            Nombre de pointages insérés
+        """
+        with self._flush_lock:
+            # Lot précédent non confirmé (erreur d'écriture) : le réessayer d'abord
+            if self.flushing_path.exists():
+                self._replay_file(self.flushing_path)
+
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, []
+                # Rotation du journal : les nouveaux pointages vont dans un fichier neuf
+                self._journal.close()
+                os.replace(self.journal_path, self.flushing_path)
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+
+            inserted = self.db_manager.insert_pointages(batch)
+            self.flushing_path.unlink()
+            logger.debug(f"Écriture groupée: {inserted} pointage(s) insérés")
+            return inserted
+
+    def replay(self) -> int:
+        """
+        Rejoue les journaux laissés par un arrêt brutal
+
+        L'insertion ignore les pointages déjà présents (même employé, même timestamp) :
+        rejouer un journal déjà partiellement appliqué ne crée pas de doublon.
+
+        Returns:
+            Nombre de pointages récupérés
+        """
+        recovered = 0
+        for path in (self.flushing_path, self.journal_path):
+            if path.exists():
+                recovered += self._replay_file(path)
+        if recovered:
+            logger.warning(f"Journal d'écriture: {recovered} pointage(s) récupéré(s) après arrêt brutal")
+        return recovered
+
+    def _replay_file(self, path: Path) -> int:
+        """Insère (sans doublon) les pointages d'un fichier journal puis le supprime"""
+        entries = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Dernière ligne tronquée par la coupure : pas encore acquittée
+                    logger.warning(f"Ligne de journal illisible ignorée: {line.strip()[:80]}")
+
+        inserted = self.db_manager.insert_pointages(entries, skip_existing=True) if entries else 0
+        path.unlink()
+        return inserted
+
+    def _run(self):
+        """Boucle du thread : écrit un lot toutes les flush_interval secondes"""
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # Les pointages restent dans le journal '.flushing' et seront réessayés
+                logger.error(f"Erreur lors de l'écriture groupée: {e}")
@@ -0,0 +1,240 @@
+"""
+Migrations du schéma de la base de pointage
+
+Chaque migration est appliquée une seule fois, dans l'ordre de version ; la version
+courante est lue dans PRAGMA user_version et la durée de chaque migration est
+enregistrée dans la table schema_migrations. Une étape peut être :
+
+- une requête SQL (exécutée dans la transaction de la migration),
+- une fonction recevant la connexion,
+- un Backfill : remplissage d'une table par tranches d'IDs, une transaction par tranche,
+  pour ne pas bloquer les pointages pendant la construction sur une grosse base.
+"""
+import logging
+import sqlite3
+import time
+import uuid
+from collections import namedtuple
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+# Lignes traitées par transaction lors d'un remplissage par tranches
+MIGRATION_BATCH_SIZE = 5000
+
+Migration = namedtuple('Migration', ['version', 'description', 'steps'])
+
+# Remplissage par tranches : sql utilise :start et :end (bornes d'ID de source_table, fin exclue).
+# La requête doit être rejouable sans doublon (INSERT OR IGNORE, ...) : une migration
+# interrompue reprend depuis le début au démarrage suivant.
+Backfill = namedtuple('Backfill', ['source_table', 'sql'])
+
+
+def add_column(table: str, column: str, definition: str) -> Callable[[sqlite3.Connection], None]:
+    """
+    Étape ajoutant une colonne seulement si elle est absente
+
+    Args:
+        table: Table à modifier
+        column: Nom de la colonne
+        definition: Type et contraintes (ex. "INTEGER DEFAULT 0")
+    """
+    def step(conn: sqlite3.Connection):
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            logger.info(f"Colonne '{column}' ajoutée à la table {table}")
+    return step
+
+
+def _create_terminal_id(conn: sqlite3.Connection):
+    """Génère l'identifiant du terminal, une fois pour toutes"""
+    conn.execute(
+        "INSERT OR IGNORE INTO terminal_info (key, value) VALUES ('terminal_id', ?)",
+        (uuid.uuid4().hex,)
+    )
+
+
+SCHEMA_MIGRATIONS = [
+    Migration(1, "Colonne synced et index composite employé/période", [
+        # Bases antérieures à la synchronisation API
+        add_column('pointages', 'synced', "INTEGER DEFAULT 0"),
+        "CREATE INDEX IF NOT EXISTS idx_employee_timestamp ON pointages(employee_id, timestamp)",
+        # Rendu redondant par idx_employee_timestamp
+        "DROP INDEX IF EXISTS idx_employee_id",
+    ]),
+    # Seule la petite queue non traitée est indexée, triée par timestamp ; les anciens
+    # index complets sur les booléens synced/exported sont supprimés.
+    Migration(2, "Index partiels des files de synchronisation et d'export", [
+        "CREATE INDEX IF NOT EXISTS idx_unsynced ON pointages(timestamp) WHERE synced = 0",
+        "CREATE INDEX IF NOT EXISTS idx_unexported ON pointages(timestamp) WHERE exported = 0",
+        "DROP INDEX IF EXISTS idx_synced",
+        "DROP INDEX IF EXISTS idx_exported",
+    ]),
+    # Heures par employé et par jour, tenues à jour à chaque pointage.
+    # Remplie par DatabaseManager.rebuild_daily_hours() juste après la migration.
+    Migration(3, "Table de synthèse daily_hours", [
+        """
+        CREATE TABLE IF NOT EXISTS daily_hours (
+            employee_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            employee_name TEXT NOT NULL,
+            hours REAL NOT NULL DEFAULT 0,
+            num_pairs INTEGER NOT NULL DEFAULT 0,
+            num_pointages INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_id, day)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_daily_hours_day ON daily_hours(day)",
+    ]),
+    # File d'envoi vers l'API : une ligne par pointage non synchronisé, avec son état de
+    # reprise. Tenue à jour par triggers quel que soit le chemin d'écriture (pointage,
+    # lot, import, mark_all_synced.py) ; synced reste la référence.
+    Migration(4, "File de synchronisation sync_outbox", [
+        """
+        CREATE TABLE IF NOT EXISTS sync_outbox (
+            pointage_id INTEGER PRIMARY KEY,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            dead INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sync_outbox_due ON sync_outbox(next_attempt_at) WHERE dead = 0",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_sync_outbox_insert AFTER INSERT ON pointages
+        WHEN NEW.synced = 0
+        BEGIN
+            INSERT OR IGNORE INTO sync_outbox (pointage_id) VALUES (NEW.id);
+        END
+        """,
+        # synced repassé à 0 : le pointage est renvoyé (avec un compteur de tentatives à zéro)
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_sync_outbox_update AFTER UPDATE OF synced ON pointages
+        WHEN NEW.synced IS NOT OLD.synced
+        BEGIN
+            DELETE FROM sync_outbox WHERE pointage_id = NEW.id AND NEW.synced != 0;
+            INSERT OR REPLACE INTO sync_outbox (pointage_id) SELECT NEW.id WHERE NEW.synced = 0;
+        END
+        """,
+        Backfill('pointages', """
+            INSERT OR IGNORE INTO sync_outbox (pointage_id)
+            SELECT id FROM pointages WHERE synced = 0 AND id >= :start AND id < :end
+        """),
+    ]),
+    # Identifiant propre à cette base : avec l'ID local, il forme la clé d'idempotence
+    # envoyée à l'API (les IDs locaux repartent de 1 sur une nouvelle base)
+    Migration(5, "Identifiant du terminal", [
+        """
+        CREATE TABLE IF NOT EXISTS terminal_info (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        """,
+        _create_terminal_id,
+    ]),
+    # Index supprimés pendant un import en masse : enregistrés dans la même transaction que
+    # leur suppression, recréés au démarrage si l'import a été interrompu (coupure, kill)
+    Migration(6, "Index reportés d'un import en masse", [
+        """
+        CREATE TABLE IF NOT EXISTS deferred_indexes (
+            name TEXT PRIMARY KEY,
+            sql TEXT NOT NULL
+        )
+        """,
+    ]),
+]
+
+# Version à partir de laquelle la table daily_hours existe
+DAILY_HOURS_VERSION = 3
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Version du schéma enregistrée dans la base"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn: sqlite3.Connection, migrations: List[Migration] = None,
+                   batch_size: int = MIGRATION_BATCH_SIZE) -> List[int]:
+    """
+    Applique les migrations pas encore appliquées sur cette base
+
+    Args:
+        conn: Connexion à migrer
+        migrations: Migrations à considérer (SCHEMA_MIGRATIONS par défaut)
+        batch_size: Lignes par transaction pour les étapes Backfill
+
+    Returns:
+        Versions appliquées
+    """
+    if migrations is None:
+        migrations = SCHEMA_MIGRATIONS
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            duration_ms REAL NOT NULL
+        )
+    """)
+
+    current_version = get_schema_version(conn)
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= current_version:
+            continue
+        started = time.monotonic()
+        _apply_migration(conn, migration, batch_size)
+        duration_ms = (time.monotonic() - started) * 1000
+
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_migrations (version, description, duration_ms) VALUES (?, ?, ?)",
+                (migration.version, migration.description, duration_ms)
+            )
+            # PRAGMA ne supporte pas les paramètres liés
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+        applied.append(migration.version)
+        logger.info(f"Migration du schéma {migration.version} appliquée "
+                    f"({migration.description}) en {duration_ms:.0f} ms")
+    return applied
+
+
+def _apply_migration(conn: sqlite3.Connection, migration: Migration, batch_size: int):
+    """Exécute les étapes d'une migration ; les Backfill valident leur propre transaction par tranche"""
+    conn.execute("BEGIN")
+    try:
+        for step in migration.steps:
+            if isinstance(step, Backfill):
+                # Valider les étapes précédentes (ex. CREATE TABLE) avant le remplissage
+                conn.commit()
+                _run_backfill(conn, step, batch_size)
+                conn.execute("BEGIN")
+            elif callable(step):
+                step(conn)
+            else:
+                conn.execute(step)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        logger.error(f"Échec de la migration du schéma {migration.version} ({migration.description})")
+        raise
+
+
+def _run_backfill(conn: sqlite3.Connection, backfill: Backfill, batch_size: int):
+    """Exécute une étape Backfill tranche par tranche d'IDs"""
+    min_id, max_id = conn.execute(
+        f"SELECT MIN(id), MAX(id) FROM {backfill.source_table}"
+    ).fetchone()
+    if min_id is None:
+        return
+
+    rows = 0
+    for start in range(min_id, max_id + 1, batch_size):
+        with conn:
+            cursor = conn.execute(backfill.sql, {'start': start, 'end': start + batch_size})
+            rows += max(cursor.rowcount, 0)
+        # Laisser passer un pointage en attente du verrou d'écriture entre deux tranches
+        time.sleep(0)
+    logger.info(f"Remplissage depuis {backfill.source_table}: {rows} ligne(s)")
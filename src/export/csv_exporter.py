@@ -3,12 +3,18 @@ Module d'export des pointages en CSV
 """
 import csv
 from datetime import datetime
+from operator import attrgetter, itemgetter
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Champs exportés, lus par position sur les PointageRow ou par clé sur les dictionnaires
+EXPORT_FIELDS = ('id', 'employee_id', 'employee_name', 'rfid', 'timestamp', 'type')
+_row_values = attrgetter(*EXPORT_FIELDS)
+_dict_values = itemgetter(*EXPORT_FIELDS)
+
 
 class CSVExporter:
     """Gère l'export des pointages en fichier CSV"""
@@ -23,13 +29,18 @@ class CSVExporter:
         self.export_dir = export_dir
         self.export_dir.mkdir(exist_ok=True)
     
-    def export_pointages(self, pointages: List[Dict], filename: str = None) -> str:
+    def export_pointages(self, pointages: Iterable, filename: str = None,
+                         exported_ids: Optional[List[int]] = None) -> str:
         """
-        Exporte une liste de pointages en CSV
+        Exporte des pointages en CSV
+        
+        Les pointages sont écrits au fil de l'eau : un itérateur (ex. DatabaseManager.iter_non_exported)
+        peut être passé pour garder une mémoire constante quel que soit le volume.
         
         Args:
-            pointages: Liste des pointages à exporter
+            pointages: Pointages à exporter (liste ou itérateur de PointageRow ou dictionnaires)
             filename: Nom du fichier (généré automatiquement si None)
+            exported_ids: Liste optionnelle complétée avec les IDs des pointages écrits
         
         Returns:
             Chemin du fichier créé
@@ -42,32 +53,31 @@ class CSVExporter:
         
         try:
             with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                fieldnames = ['ID', 'Matricule', 'Nom', 'RFID', 'Date', 'Heure', 'Type']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames, delimiter=';')
-                
-                writer.writeheader()
+                writer = csv.writer(csvfile, delimiter=';')
+                writer.writerow(['ID', 'Matricule', 'Nom', 'RFID', 'Date', 'Heure', 'Type'])
                 
+                count = 0
                 for pointage in pointages:
+                    if isinstance(pointage, dict):
+                        pointage_id, employee_id, name, rfid, timestamp, pointage_type = _dict_values(pointage)
+                    else:
+                        pointage_id, employee_id, name, rfid, timestamp, pointage_type = _row_values(pointage)
+                    
                     # Parser la date et l'heure
                     try:
-                        dt = datetime.fromisoformat(pointage['timestamp'])
+                        dt = datetime.fromisoformat(timestamp)
                         date_str = dt.strftime("%d/%m/%Y")
                         heure_str = dt.strftime("%H:%M:%S")
-                    except:
-                        date_str = pointage['timestamp']
+                    except (TypeError, ValueError):
+                        date_str = timestamp
                         heure_str = ""
                     
-                    writer.writerow({
-                        'ID': pointage['id'],
-                        'Matricule': pointage['employee_id'],
-                        'Nom': pointage['employee_name'],
-                        'RFID': pointage['rfid'],
-                        'Date': date_str,
-                        'Heure': heure_str,
-                        'Type': pointage['type']
-                    })
+                    writer.writerow([pointage_id, employee_id, name, rfid, date_str, heure_str, pointage_type])
+                    count += 1
+                    if exported_ids is not None:
+                        exported_ids.append(pointage_id)
             
-            logger.info(f"Export CSV réussi: {filepath} ({len(pointages)} pointages)")
+            logger.info(f"Export CSV réussi: {filepath} ({count} pointages)")
             return str(filepath)
             
         except Exception as e:
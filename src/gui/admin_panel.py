@@ -9,12 +9,15 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
 from PyQt5.QtCore import Qt, QDate, QTimer, pyqtSignal, QObject
 from PyQt5.QtGui import QFont, QColor
 import logging
-import requests
+from pathlib import Path
 import urllib3
 
 # Désactiver les avertissements SSL pour les requêtes locales
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+from src.api import download_employees, get_api_client
+from .async_db import AsyncDatabase
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,6 +33,11 @@ class AdminPanel(QMainWindow):
         super().__init__(parent)
         
         self.db_manager = db_manager
+        # Rapports et exports : connexions en lecture seule, jamais en concurrence avec un pointage
+        self.db_reader = db_manager.reader()
+        # Requêtes de consultation hors du thread Qt, sur un thread propre au panneau : un long
+        # rapport ne retarde jamais les pointages (thread base de la fenêtre principale)
+        self.async_db = AsyncDatabase(self.db_reader, self)
         self.rfid_reader = rfid_reader
         self.restore_rfid_callback = restore_rfid_callback  # Callback pour restaurer la lecture normale
         
@@ -43,19 +51,14 @@ class AdminPanel(QMainWindow):
             self.api_url = api_config.API_URL
             self.id_compte = api_config.ACCOUNT_ID
             self.api_key = api_config.API_KEY
+            # Session HTTP partagée avec la fenêtre principale (en-têtes d'authentification inclus)
+            self.api = get_api_client(self.api_url, self.id_compte, self.api_key)
         except (ImportError, AttributeError) as e:
             logger.error(f"Configuration API manquante: {e}")
             raise RuntimeError("Fichier config/api_config.py requis avec API_URL, ACCOUNT_ID et API_KEY")
         
         self.init_ui()
     
-    def get_api_headers(self):
-        """Retourne les headers HTTP pour les appels API"""
-        return {
-            'X-API-Key': self.api_key,
-            'X-Account-ID': str(self.id_compte)
-        }
-    
     def init_ui(self):
         """Initialise l'interface"""
         self.setWindowTitle("Panneau d'Administration")
@@ -232,40 +235,47 @@ class AdminPanel(QMainWindow):
         return widget
     
     def refresh_pointages_table(self):
-        """Rafraîchit la table des pointages"""
+        """Rafraîchit la table des pointages (requête dans le thread base de données)"""
         start = self.start_date.date().toPyDate()
         end = self.end_date.date().toPyDate()
         
-        pointages = self.db_manager.get_pointages_by_date(start, end)
-        
+        # Lignes compactes (tuples nommés) : pas de dictionnaire alloué par pointage
+        self.async_db.call(self.db_reader.get_pointages_by_date, start, end, as_rows=True,
+                           on_result=self._fill_pointages_table)
+    
+    def _fill_pointages_table(self, pointages):
+        """Remplit la table avec les pointages lus"""
         self.pointages_table.setRowCount(len(pointages))
         
         for i, pointage in enumerate(pointages):
-            dt = datetime.fromisoformat(pointage['timestamp'])
+            dt = datetime.fromisoformat(pointage.timestamp)
             
             self.pointages_table.setItem(i, 0, QTableWidgetItem(dt.strftime("%d/%m/%Y %H:%M:%S")))
-            self.pointages_table.setItem(i, 1, QTableWidgetItem(pointage['employee_id']))
-            self.pointages_table.setItem(i, 2, QTableWidgetItem(pointage['employee_name']))
-            self.pointages_table.setItem(i, 3, QTableWidgetItem(pointage['rfid']))
-            self.pointages_table.setItem(i, 4, QTableWidgetItem(pointage['type']))
+            self.pointages_table.setItem(i, 1, QTableWidgetItem(pointage.employee_id))
+            self.pointages_table.setItem(i, 2, QTableWidgetItem(pointage.employee_name))
+            self.pointages_table.setItem(i, 3, QTableWidgetItem(pointage.rfid))
+            self.pointages_table.setItem(i, 4, QTableWidgetItem(pointage.type))
             
             # Colonne Synchronisé (état de sync vers l'API)
-            synced_status = 'Oui' if pointage.get('synced', 0) else 'Non'
+            synced_status = 'Oui' if pointage.synced else 'Non'
             synced_item = QTableWidgetItem(synced_status)
-            if pointage.get('synced', 0):
+            if pointage.synced:
                 synced_item.setForeground(Qt.darkGreen)
             else:
                 synced_item.setForeground(Qt.darkRed)
             self.pointages_table.setItem(i, 5, synced_item)
             
             # Colonne Exporté (état d'export CSV/FTP)
-            self.pointages_table.setItem(i, 6, QTableWidgetItem('Oui' if pointage['exported'] else 'Non'))
+            self.pointages_table.setItem(i, 6, QTableWidgetItem('Oui' if pointage.exported else 'Non'))
     
     def generate_daily_report(self):
         """Génère un rapport journalier"""
         today = date.today()
-        pointages = self.db_manager.get_pointages_by_date(today, today)
-        
+        self.async_db.call(self.db_reader.get_pointages_by_date, today, today,
+                           on_result=lambda pointages: self._show_daily_report(today, pointages))
+    
+    def _show_daily_report(self, today, pointages):
+        """Affiche le rapport journalier à partir des pointages du jour"""
         report = f"=== RAPPORT JOURNALIER - {today.strftime('%d/%m/%Y')} ===\n\n"
         report += f"Nombre total de pointages: {len(pointages)}\n\n"
         
@@ -293,23 +303,22 @@ class AdminPanel(QMainWindow):
         week_start = today - timedelta(days=today.weekday())
         week_end = week_start + timedelta(days=6)
         
-        pointages = self.db_manager.get_pointages_by_date(week_start, week_end)
+        # Heures de tous les employés calculées en une seule requête
+        self.async_db.call(
+            self.db_reader.get_all_employees_hours, week_start, week_end,
+            on_result=lambda all_hours: self._show_weekly_report(week_start, week_end, all_hours)
+        )
+    
+    def _show_weekly_report(self, week_start, week_end, all_hours):
+        """Affiche le rapport hebdomadaire à partir des heures par employé"""
+        total_pointages = sum(h['num_pointages'] for h in all_hours.values())
         
         report = f"=== RAPPORT HEBDOMADAIRE ===\n"
         report += f"Du {week_start.strftime('%d/%m/%Y')} au {week_end.strftime('%d/%m/%Y')}\n\n"
-        report += f"Nombre total de pointages: {len(pointages)}\n\n"
-        
-        # Grouper par employé
-        employees = {}
-        for p in pointages:
-            emp_id = p['employee_id']
-            if emp_id not in employees:
-                employees[emp_id] = {'name': p['employee_name'], 'pointages': []}
-            employees[emp_id]['pointages'].append(p)
+        report += f"Nombre total de pointages: {total_pointages}\n\n"
         
-        for emp_id, data in employees.items():
-            hours_data = self.db_manager.get_employee_hours(emp_id, week_start, week_end)
-            report += f"\n{data['name']} ({emp_id}):\n"
+        for emp_id, hours_data in all_hours.items():
+            report += f"\n{hours_data['employee_name']} ({emp_id}):\n"
             report += f"  Total heures: {hours_data['total_hours']:.2f}h\n"
             report += f"  Nombre de pointages: {hours_data['num_pointages']}\n"
         
@@ -317,8 +326,10 @@ class AdminPanel(QMainWindow):
     
     def update_export_stats(self):
         """Met à jour les statistiques d'export"""
-        non_exported = self.db_manager.get_non_exported_pointages()
-        self.export_stats.setText(f"Pointages en attente d'export: {len(non_exported)}")
+        self.async_db.call(
+            self.db_reader.count_non_exported_pointages,
+            on_result=lambda count: self.export_stats.setText(f"Pointages en attente d'export: {count}")
+        )
     
     def export_csv_only(self):
         """Exporte uniquement en CSV"""
@@ -326,21 +337,23 @@ class AdminPanel(QMainWindow):
         from src.export import CSVExporter
         
         try:
-            non_exported = self.db_manager.get_non_exported_pointages()
-            
-            if not non_exported:
-                QMessageBox.information(self, "Export", "Aucun pointage à exporter.")
-                return
-            
-            exporter = CSVExporter(EXPORTS_DIR)
-            filepath = exporter.export_pointages(non_exported)
+            # Comptage et export dans le même instantané de la base
+            with self.db_reader.snapshot() as reader:
+                if not reader.count_non_exported_pointages():
+                    QMessageBox.information(self, "Export", "Aucun pointage à exporter.")
+                    return
+                
+                # Export en flux : les pointages ne sont jamais tous chargés en mémoire
+                exporter = CSVExporter(EXPORTS_DIR)
+                ids = []
+                filepath = exporter.export_pointages(reader.iter_non_exported(as_rows=True),
+                                                     exported_ids=ids)
             
             QMessageBox.information(self, "Export réussi", 
                                   f"Export CSV réussi!\n\nFichier: {filepath}\n"
-                                  f"Pointages exportés: {len(non_exported)}")
+                                  f"Pointages exportés: {len(ids)}")
             
             # Marquer comme exportés
-            ids = [p['id'] for p in non_exported]
             self.db_manager.mark_as_exported(ids)
             self.update_export_stats()
             
@@ -360,15 +373,16 @@ class AdminPanel(QMainWindow):
                                   "Vérifiez le fichier .env")
                 return
             
-            non_exported = self.db_manager.get_non_exported_pointages()
-            
-            if not non_exported:
-                QMessageBox.information(self, "Export", "Aucun pointage à exporter.")
-                return
-            
-            # Export CSV
-            exporter = CSVExporter(EXPORTS_DIR)
-            filepath = exporter.export_pointages(non_exported)
+            # Comptage et export CSV (en flux) dans le même instantané de la base
+            with self.db_reader.snapshot() as reader:
+                if not reader.count_non_exported_pointages():
+                    QMessageBox.information(self, "Export", "Aucun pointage à exporter.")
+                    return
+                
+                exporter = CSVExporter(EXPORTS_DIR)
+                ids = []
+                filepath = exporter.export_pointages(reader.iter_non_exported(as_rows=True),
+                                                     exported_ids=ids)
             
             # Upload FTP
             uploader = FTPUploader(FTP_HOST, FTP_PORT, FTP_USER, FTP_PASSWORD, FTP_REMOTE_PATH)
@@ -376,14 +390,13 @@ class AdminPanel(QMainWindow):
             
             if success:
                 # Marquer comme exportés
-                ids = [p['id'] for p in non_exported]
                 self.db_manager.mark_as_exported(ids)
                 self.update_export_stats()
                 
                 QMessageBox.information(self, "Export réussi",
                                       f"Export et envoi FTP réussis!\n\n"
                                       f"Fichier: {filepath}\n"
-                                      f"Pointages exportés: {len(non_exported)}")
+                                      f"Pointages exportés: {len(ids)}")
             else:
                 QMessageBox.warning(self, "Erreur FTP",
                                   f"Export CSV réussi mais l'envoi FTP a échoué.\n\n"
@@ -604,7 +617,7 @@ class AdminPanel(QMainWindow):
         
         try:
             url = f"{api_url}/api_list_employees.php?id_compte={id_compte}"
-            response = requests.get(url, headers=self.get_api_headers(), timeout=10, verify=False)
+            response = self.api.get(url)
             response.raise_for_status()
             
             data = response.json()
@@ -986,7 +999,7 @@ class AdminPanel(QMainWindow):
                 'rfid_code': rfid_code
             }
             
-            response = requests.post(url, json=data, headers=self.get_api_headers(), timeout=10, verify=False)
+            response = self.api.post(url, json=data)
             response.raise_for_status()
             
             result = response.json()
@@ -1044,36 +1057,17 @@ class AdminPanel(QMainWindow):
     def generate_employees_json_file(self):
         """Génère et télécharge le fichier employees.json depuis l'API"""
         try:
-            api_url = self.api_url
             id_compte = str(self.id_compte)
             
             self.rfid_log("📄 Génération du fichier employees.json...")
             
-            # Télécharger le fichier depuis l'API
-            url = f"{api_url}/api_download_employees_json.php?id_compte={id_compte}"
-            response = requests.get(url, headers=self.get_api_headers(), timeout=10, verify=False)
-            response.raise_for_status()
-            
-            # Sauvegarder dans config/employees.json
-            import os
-            from pathlib import Path
-            
             # Trouver le chemin du fichier de configuration
             config_dir = Path(__file__).parent.parent.parent / 'config'
             employees_file = config_dir / 'employees.json'
             
-            # Écrire le contenu
-            with open(employees_file, 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            
-            # Vérifier le nombre d'employés
-            import json
-            data = json.loads(response.text)
-            # Support pour les deux formats : tableau direct ou objet avec clé 'employees'
-            if isinstance(data, list):
-                employee_count = len(data)
-            else:
-                employee_count = len(data.get('employees', []))
+            # Liste complète (sans requête conditionnelle) : met aussi à jour les validateurs
+            # utilisés par la synchronisation périodique
+            employee_count = download_employees(self.api, id_compte, employees_file, force=True)
             
             self.rfid_log(f"✓ Fichier employees.json généré avec {employee_count} employé(s)")
             self.rfid_log(f"  Emplacement: {employees_file}")
@@ -1157,7 +1151,7 @@ class AdminPanel(QMainWindow):
                 'id_compte': id_compte
             }
             
-            response = requests.post(url, json=data, headers=self.get_api_headers(), timeout=10, verify=False)
+            response = self.api.post(url, json=data)
             response.raise_for_status()
             
             result = response.json()
@@ -1220,6 +1214,8 @@ class AdminPanel(QMainWindow):
         except Exception as e:
             logger.error(f"Erreur lors de la fermeture du panneau admin: {e}")
         
+        self.async_db.shutdown()
+        
         event.accept()
 
 
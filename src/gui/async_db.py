@@ -0,0 +1,63 @@
+"""
+Accès asynchrone à la base de données pour l'interface Qt
+"""
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase(QObject):
+    """
+    Exécute les appels à DatabaseManager sur un thread dédié
+
+    Les requêtes s'exécutent dans l'ordre de soumission, hors de la boucle d'événements Qt :
+    une carte SD lente ne fige plus l'horloge ni les animations. Les callbacks sont rappelés
+    dans le thread Qt principal, ils peuvent donc mettre à jour les widgets.
+    """
+    # (callback, valeur) réémis depuis le thread base de données vers le thread Qt
+    _finished = pyqtSignal(object, object)
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+        self._finished.connect(self._dispatch)
+
+    def call(self, func, *args, on_result=None, on_error=None, **kwargs) -> Future:
+        """
+        Soumet un appel au thread base de données
+
+        Args:
+            func: Méthode à exécuter (ex. self.db_manager.get_pointages_by_date)
+            on_result: Callback(résultat) appelé dans le thread Qt en cas de succès
+            on_error: Callback(exception) appelé dans le thread Qt en cas d'erreur
+
+        Returns:
+            Future de l'appel
+        """
+        future = self._executor.submit(func, *args, **kwargs)
+        future.add_done_callback(lambda f: self._on_done(f, on_result, on_error))
+        return future
+
+    def _on_done(self, future: Future, on_result, on_error):
+        """Appelé dans le thread base de données à la fin d'un appel"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Erreur base de données (thread dédié): {error}")
+            if on_error:
+                self._finished.emit(on_error, error)
+        elif on_result:
+            self._finished.emit(on_result, future.result())
+
+    def _dispatch(self, callback, value):
+        """Exécute un callback dans le thread Qt principal"""
+        callback(value)
+
+    def shutdown(self):
+        """Termine les appels en cours puis arrête le thread"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,135 @@
+"""
+Tableau de bord des employés sans blocage de l'interface Qt
+"""
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_ENDPOINT = "api_get_employee_dashboard.php"
+DASHBOARD_TTL = 30        # âge (secondes) au-delà duquel le dashboard affiché est rafraîchi
+DASHBOARD_TIMEOUT = 5     # délai d'une requête (secondes)
+
+
+class DashboardService(QObject):
+    """
+    Récupère le dashboard des employés (stale-while-revalidate)
+
+    Le dernier dashboard connu de l'employé (du jour) est servi immédiatement depuis le
+    cache ; s'il date de plus de ttl secondes, il est rafraîchi par une requête en
+    arrière-plan et le callback est rappelé avec la nouvelle version. cancel() (badge
+    retiré) abandonne les requêtes en cours : leur réponse n'est jamais affichée.
+    Les callbacks sont rappelés dans le thread Qt principal.
+    """
+    # Fonction réémise depuis le thread des requêtes vers le thread Qt
+    _finished = pyqtSignal(object)
+
+    def __init__(self, api, id_compte, ttl: float = DASHBOARD_TTL, parent=None):
+        """
+        Args:
+            api: Client de l'API (voir src.api.get_api_client)
+            id_compte: ID du compte
+            ttl: Âge maximum (secondes) d'un dashboard servi sans rafraîchissement
+        """
+        super().__init__(parent)
+        self.api = api
+        self.id_compte = id_compte
+        self.ttl = ttl
+        # id_emp -> (jour, instant de la réponse, données)
+        self._cache = {}
+        # id_emp -> (génération, Future) des requêtes en cours
+        self._pending = {}
+        # Incrémentée par cancel() : les réponses des générations précédentes sont ignorées
+        self._generation = 0
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="dashboard")
+        self._finished.connect(self._dispatch)
+
+    def get(self, id_emp, on_data, on_error=None) -> bool:
+        """
+        Demande le dashboard d'un employé (appel non bloquant)
+
+        Args:
+            id_emp: ID de l'employé
+            on_data: Callback(données) : version en cache tout de suite, puis version rafraîchie
+            on_error: Callback(exception) si le rafraîchissement échoue
+
+        Returns:
+            True si une version en cache a été servie immédiatement
+        """
+        today = date.today().isoformat()
+        cached = self._cache.get(id_emp)
+        served = cached is not None and cached[0] == today
+        if served:
+            on_data(cached[2])
+            if time.monotonic() - cached[1] < self.ttl:
+                return served
+
+        pending = self._pending.get(id_emp)
+        if pending is not None and pending[0] == self._generation:
+            # Rafraîchissement déjà en cours pour ce badge
+            return served
+
+        generation = self._generation
+        future = self._executor.submit(self._fetch, id_emp, today)
+        self._pending[id_emp] = (generation, future)
+        future.add_done_callback(lambda f: self._finished.emit(
+            lambda: self._on_fetched(id_emp, today, generation, f, on_data, on_error)
+        ))
+        return served
+
+    def cancel(self):
+        """Abandonne les requêtes en cours (badge retiré) : leurs réponses ne sont pas affichées"""
+        self._generation += 1
+        # Copie : annuler une requête en file rappelle aussitôt _on_fetched, qui modifie _pending
+        pending, self._pending = list(self._pending.values()), {}
+        for _, future in pending:
+            future.cancel()
+
+    def shutdown(self):
+        """Abandonne les requêtes en cours et arrête le thread (sans attendre l'API)"""
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _fetch(self, id_emp, day: str):
+        """Requête à l'API (thread des requêtes)"""
+        logger.info(f"Récupération des données dashboard pour employé {id_emp}...")
+        response = self.api.get(DASHBOARD_ENDPOINT, params={
+            'id_emp': id_emp,
+            'id_compte': self.id_compte,
+            'date': day
+        }, timeout=DASHBOARD_TIMEOUT)
+        response.raise_for_status()
+
+        data = response.json()
+        if not data.get('success'):
+            raise ValueError(f"Erreur API: {data.get('error', 'Erreur inconnue')}")
+        return data['data']
+
+    def _on_fetched(self, id_emp, day: str, generation: int, future: Future, on_data, on_error):
+        """Fin d'une requête (thread Qt) : met le cache à jour et rappelle le demandeur"""
+        if self._pending.get(id_emp, (None, None))[1] is future:
+            del self._pending[id_emp]
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is None:
+            # Conservé même si le badge a été retiré : servi instantanément au prochain passage
+            self._cache[id_emp] = (day, time.monotonic(), future.result())
+        if generation != self._generation:
+            return
+
+        if error is None:
+            on_data(future.result())
+        else:
+            logger.error(f"Erreur lors de la récupération des données: {error}")
+            if on_error:
+                on_error(error)
+
+    def _dispatch(self, callback):
+        """Exécute une fonction dans le thread Qt principal"""
+        callback()
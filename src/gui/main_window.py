@@ -6,13 +6,20 @@ Inspirée de l'application Tipee avec un design épuré et intuitif
 import csv
 import json
 import logging
+import random
+import threading
+from collections import namedtuple
 from datetime import datetime, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
+from typing import Iterator, Optional
 
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QPushButton, QFrame, QGridLayout, QApplication, QLineEdit, 
                              QDialog, QMessageBox)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QObject, QPropertyAnimation, QEasingCurve, QSize
+from PyQt5.QtCore import (Qt, QTimer, pyqtSignal, pyqtSlot, QObject, QThread, QPropertyAnimation,
+                          QEasingCurve, QSize)
 from PyQt5.QtGui import QFont, QColor, QPalette, QPixmap, QIcon, QImage, QPainter
 
 # Import optionnel pour le support SVG (rendu en pixmap pour éviter plantage sur Raspberry)
@@ -60,6 +67,10 @@ import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 from config import settings
+from src.api import download_employees, get_api_client
+from src.database import DatabaseBackup
+from .async_db import AsyncDatabase
+from .dashboard_service import DashboardService
 
 
 class RFIDSignal(QObject):
@@ -67,93 +78,391 @@ class RFIDSignal(QObject):
     card_detected = pyqtSignal(str)
 
 
+# Résultat d'un envoi : IDs acceptés, refus [(ID, motif)], envois échoués faute de réseau
+SendResult = namedtuple('SendResult', ['accepted', 'rejected', 'failed'])
+
+
 class SyncWorker(QObject):
-    """Worker pour synchroniser les pointages en arrière-plan"""
+    """
+    Worker pour synchroniser les pointages en arrière-plan
+    
+    Vit dans son propre QThread et planifie lui-même ses cycles : peu après chaque nouveau
+    pointage, en rafale tant qu'il reste un arriéré, avec un recul exponentiel (et gigue)
+    après une erreur réseau, sinon toutes les SYNC_IDLE_INTERVAL secondes. Les pointages
+    refusés par l'API ont leur propre délai de reprise (file sync_outbox).
+    """
     sync_finished = pyqtSignal(int, int)  # (succès, erreurs)
     
+    # Réponses HTTP indiquant que l'endpoint d'envoi par lot n'existe pas sur le serveur
+    BATCH_UNSUPPORTED_STATUS = (404, 405, 501)
+    # Réponses HTTP refusant le contenu d'un pointage, comptées comme un refus (sync_outbox).
+    # Les autres erreurs (5xx, 401/403 clé API expirée, 429...) viennent du serveur ou de la
+    # configuration : recul du worker, sans tentative comptée ni mise à l'écart du pointage
+    REJECTED_STATUS = (400, 422)
+    # Pointages lus par paquet en mode unitaire (répartis entre les requêtes parallèles)
+    SINGLE_MODE_CHUNK = 100
+    
     def __init__(self, db_manager, api_url, id_compte, api_key):
         super().__init__()
         self.db_manager = db_manager
         self.api_url = api_url
         self.id_compte = id_compte
         self.api_key = api_key
+        # Session HTTP partagée (connexions conservées, en-têtes d'authentification par défaut)
+        self.api = get_api_client(api_url, id_compte, api_key)
         self.running = True
+        # Envoi par lots ; repasse en mode unitaire si le serveur ne connaît pas l'endpoint
+        self.batch_size = max(1, settings.SYNC_BATCH_SIZE)
+        self.batch_supported = self.batch_size > 1
+        # Mode unitaire : jusqu'à SYNC_PARALLELISM requêtes en vol (une file par employé)
+        self.parallelism = max(1, settings.SYNC_PARALLELISM)
+        self._executor = ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix="sync")
+        # Prochain cycle ; enfant du worker, le timer le suit dans le thread de synchronisation
+        self.failures = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.sync_pointages)
+    
+    @pyqtSlot()
+    def start_schedule(self):
+        """Planifie le premier cycle (connecté au démarrage du thread)"""
+        self._schedule(settings.SYNC_STARTUP_DELAY)
+    
+    @pyqtSlot()
+    def wake(self):
+        """Nouveau pointage enregistré : synchroniser sous SYNC_NEW_POINTAGE_DELAY secondes"""
+        if self.failures:
+            # API injoignable : le recul en cours est conservé
+            return
+        delay_ms = int(settings.SYNC_NEW_POINTAGE_DELAY * 1000)
+        if not self.timer.isActive() or self.timer.remainingTime() > delay_ms:
+            self._schedule(settings.SYNC_NEW_POINTAGE_DELAY)
     
+    def _schedule(self, seconds: float):
+        """Démarre le timer du prochain cycle"""
+        if self.running:
+            self.timer.start(int(seconds * 1000))
+    
+    def _schedule_next(self, failed_count: int, remaining: int):
+        """Choisit le délai avant le prochain cycle selon le résultat du cycle terminé"""
+        if failed_count:
+            self.failures += 1
+            delay = min(settings.SYNC_BACKOFF_MAX,
+                        settings.SYNC_BACKOFF_BASE * 2 ** min(self.failures - 1, 16))
+            # Gigue : les terminaux d'un même site ne relancent pas tous en même temps
+            delay *= random.uniform(0.5, 1.0)
+            logger.info(f"Prochaine synchronisation dans {delay:.0f} s (échec n°{self.failures})")
+        else:
+            self.failures = 0
+            delay = settings.SYNC_DRAIN_DELAY if remaining else settings.SYNC_IDLE_INTERVAL
+        self._schedule(delay)
+    
+    @pyqtSlot()
     def sync_pointages(self):
-        """Synchronise les pointages non synchronisés avec l'API"""
+        """Exécute un cycle de synchronisation puis planifie le suivant (thread de sync)"""
         if not self.running:
             return
+        self.timer.stop()
+        
+        remaining = 0
+        try:
+            failed_count = self._sync_cycle()
+            remaining = self.db_manager.count_sync_due()
+        except Exception as e:
+            failed_count = 1
+            logger.error(f"✗ Erreur lors de la synchronisation: {e}")
+        self._schedule_next(failed_count, remaining)
+    
+    def _sync_cycle(self) -> int:
+        """
+        Envoie à l'API les pointages dus de la file sync_outbox
         
-        unsynced = self.db_manager.get_unsynced_pointages()
+        Les pointages acceptés sont marqués synchronisés ; ceux refusés par l'API sont
+        replanifiés avec un délai croissant, puis mis à l'écart après SYNC_MAX_ATTEMPTS refus
+        (voir DatabaseManager.record_sync_failures).
         
-        if not unsynced:
+        Returns:
+            Nombre d'envois échoués faute de réseau ou de serveur disponible (au moins 1 si
+            aucun pointage dû n'a pu être traité : le cycle suivant est différé, pas enchaîné)
+        """
+        due_count = self.db_manager.count_sync_due()
+        
+        if not due_count:
             logger.debug("Aucun pointage à synchroniser")
-            return
+            return 0
         
-        logger.info(f"Synchronisation de {len(unsynced)} pointage(s) vers l'API...")
+        logger.info(f"Synchronisation de {due_count} pointage(s) vers l'API...")
         
         success_count = 0
-        error_count = 0
-        synced_ids = []
+        rejected_count = 0
+        failed_count = 0
+        
+        # Employés dont un pointage a échoué : leurs pointages suivants attendent le prochain cycle
+        blocked = set()
+        # Levé à la première erreur réseau : les tâches en attente n'envoient plus rien
+        abort = threading.Event()
+        
+        # Lecture en flux : mémoire constante même après une longue coupure réseau
+        pointages = self.db_manager.iter_sync_due()
+        while self.running:
+            chunk_size = self.batch_size if self.batch_supported else max(self.batch_size, self.SINGLE_MODE_CHUNK)
+            chunk = list(islice(pointages, chunk_size))
+            if not chunk:
+                break
+            chunk = [pointage for pointage in chunk if pointage['employee_id'] not in blocked]
+            if not chunk:
+                continue
+            
+            result = None
+            if self.batch_supported:
+                try:
+                    result = self._send_batch(chunk)
+                except requests.RequestException as e:
+                    # Réseau ou serveur indisponible : inutile d'insister, reprise au prochain cycle
+                    failed_count += 1
+                    logger.error(f"✗ Erreur sync par lot ({len(chunk)} pointages): {e}")
+                    break
+            
+            # Mode unitaire : résultats au fil des réponses, employé par employé
+            results = [result] if result is not None else self._send_parallel(chunk, blocked, abort)
+            employees = {pointage['id']: pointage['employee_id'] for pointage in chunk}
+            for accepted, rejected, failed in results:
+                # Marquer au fil de l'eau : un cycle interrompu ne renvoie pas ce qui est accepté
+                if accepted:
+                    self.db_manager.mark_as_synced(accepted)
+                if rejected:
+                    self.db_manager.record_sync_failures(
+                        rejected, settings.SYNC_RETRY_BASE, settings.SYNC_RETRY_MAX, settings.SYNC_MAX_ATTEMPTS
+                    )
+                    blocked.update(employees[pointage_id] for pointage_id, _ in rejected)
+                success_count += len(accepted)
+                rejected_count += len(rejected)
+                failed_count += failed
+            
+            if failed_count:
+                # Réseau ou serveur indisponible (comme en mode lot) : reprise au prochain cycle
+                break
+        
+        logger.info(f"✓ Synchronisation terminée: {success_count} succès, "
+                    f"{rejected_count} refus, {failed_count} erreurs réseau")
+        self.sync_finished.emit(success_count, rejected_count + failed_count)
+        if self.running and not (success_count or rejected_count or failed_count):
+            # Aucun progrès : ne pas renvoyer le même arriéré toutes les SYNC_DRAIN_DELAY secondes
+            logger.warning("✗ Aucun pointage traité par ce cycle de synchronisation")
+            return 1
+        return failed_count
+    
+    def _payload(self, pointage) -> dict:
+        """Données d'un pointage au format de l'API (avec sa clé d'idempotence)"""
+        timestamp = datetime.fromisoformat(pointage['timestamp'])
+        return {
+            'id_emp': int(pointage['employee_id']),
+            'id_compte': self.id_compte,
+            'date': timestamp.strftime("%Y-%m-%d"),
+            'heure': timestamp.strftime("%H:%M:%S"),
+            'idempotency_key': self.db_manager.sync_key(pointage['id'])
+        }
+    
+    def _send_parallel(self, chunk, blocked: set, abort: threading.Event) -> Iterator[SendResult]:
+        """
+        Envoie des pointages un par un, plusieurs requêtes en parallèle
         
-        for pointage in unsynced:
+        Les pointages d'un même employé sont envoyés dans l'ordre par une seule tâche, qui
+        s'arrête au premier échec et bloque l'employé pour le reste du cycle : une SORTIE
+        n'arrive jamais avant l'ENTREE qui la précède. Les employés différents sont traités
+        en parallèle. À la première erreur réseau, abort est levé et les tâches n'envoient
+        plus rien : le cycle ne paie pas un délai d'attente par employé.
+        
+        Args:
+            chunk: Pointages à envoyer (triés par timestamp)
+            blocked: Employés en échec pendant ce cycle (complété par les tâches)
+            abort: Interruption du cycle (levé par les tâches)
+        
+        Returns:
+            Itérateur des résultats, un par employé, dans l'ordre de fin des tâches
+        """
+        by_employee = {}
+        for pointage in chunk:
+            if pointage['employee_id'] not in blocked:
+                by_employee.setdefault(pointage['employee_id'], []).append(pointage)
+        
+        futures = [self._executor.submit(self._send_in_order, rows, blocked, abort)
+                   for rows in by_employee.values()]
+        for future in as_completed(futures):
+            yield future.result()
+    
+    def _send_in_order(self, rows, blocked: set, abort: threading.Event) -> SendResult:
+        """Envoie dans l'ordre les pointages d'un employé, jusqu'au premier échec"""
+        accepted = []
+        for pointage in rows:
+            if not self.running or abort.is_set():
+                break
             try:
-                # Convertir le timestamp
-                timestamp = datetime.fromisoformat(pointage['timestamp'])
-                date_str = timestamp.strftime("%Y-%m-%d")
-                heure_str = timestamp.strftime("%H:%M:%S")
-                
-                # Appeler l'API
-                url = f"{self.api_url}/api_save_pointage.php"
-                data = {
-                    'id_emp': int(pointage['employee_id']),
-                    'id_compte': self.id_compte,
-                    'date': date_str,
-                    'heure': heure_str
-                }
-                
-                headers = {
-                    'Content-Type': 'application/json',
-                    'X-API-Key': self.api_key,
-                    'X-Account-ID': str(self.id_compte)
-                }
-                
-                response = requests.post(url, json=data, headers=headers, timeout=10, verify=False)
-                response.raise_for_status()
-                
-                result = response.json()
-                
-                if result.get('success'):
-                    synced_ids.append(pointage['id'])
-                    success_count += 1
-                    logger.debug(f"✓ Pointage {pointage['id']} synchronisé")
-                else:
-                    error_count += 1
-                    logger.warning(f"✗ Erreur API pour pointage {pointage['id']}: {result.get('error')}")
-                    
-            except Exception as e:
-                error_count += 1
+                error = self._send_single(pointage)
+            except requests.RequestException as e:
                 logger.error(f"✗ Erreur sync pointage {pointage['id']}: {e}")
+                blocked.add(pointage['employee_id'])
+                abort.set()
+                return SendResult(accepted, [], 1)
+            if error is not None:
+                blocked.add(pointage['employee_id'])
+                return SendResult(accepted, [(pointage['id'], error)], 0)
+            accepted.append(pointage['id'])
+        return SendResult(accepted, [], 0)
+    
+    def _send_single(self, pointage) -> Optional[str]:
+        """
+        Envoie un pointage seul
+        
+        Returns:
+            None si l'API l'accepte, sinon le motif du refus
+        
+        Raises:
+            requests.RequestException: réseau, serveur indisponible, accès refusé (voir
+                REJECTED_STATUS) ou réponse illisible
+        """
+        try:
+            payload = self._payload(pointage)
+        except (TypeError, ValueError) as e:
+            error = f"Pointage invalide: {e}"
+            logger.warning(f"✗ {error} (pointage {pointage['id']})")
+            return error
         
-        # Marquer les pointages synchronisés
-        if synced_ids:
-            self.db_manager.mark_as_synced(synced_ids)
-            logger.info(f"✓ Synchronisation terminée: {success_count} succès, {error_count} erreurs")
+        try:
+            response = self.api.post("api_save_pointage.php", json=payload,
+                                     headers={'Idempotency-Key': payload['idempotency_key']})
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            if e.response.status_code not in self.REJECTED_STATUS:
+                raise
+            logger.warning(f"✗ Pointage {pointage['id']} refusé par l'API: {e}")
+            return str(e)
+        
+        try:
+            result = response.json()
+        except ValueError:
+            result = None
+        if not isinstance(result, dict):
+            # Endpoint en erreur (page PHP, proxy...) : le pointage n'est pas en cause
+            raise requests.RequestException(f"Réponse invalide de l'API pour pointage {pointage['id']}")
+        
+        if result.get('success'):
+            logger.debug(f"✓ Pointage {pointage['id']} synchronisé")
+            return None
+        error = str(result.get('error') or "Refusé par l'API")
+        logger.warning(f"✗ Erreur API pour pointage {pointage['id']}: {error}")
+        return error
+    
+    def _send_batch(self, chunk) -> Optional[SendResult]:
+        """
+        Envoie un lot de pointages en une seule requête
+        
+        Réponse attendue : {"success": true, "results": [{"local_id": 12, "success": true}, ...]}
+        (sans "results", un succès global vaut pour tout le lot).
+        
+        Returns:
+            Résultat du lot, ou None s'il doit être envoyé pointage par pointage : endpoint
+            inconnu du serveur (passage définitif en mode unitaire) ou lot refusé en bloc
+            (pour isoler le pointage en cause)
+        
+        Raises:
+            requests.RequestException: réseau, serveur indisponible ou accès refusé (voir
+                REJECTED_STATUS)
+        """
+        items = []
+        rejected = []
+        for pointage in chunk:
+            try:
+                item = self._payload(pointage)
+            except (TypeError, ValueError) as e:
+                rejected.append((pointage['id'], f"Pointage invalide: {e}"))
+                continue
+            item['local_id'] = pointage['id']
+            items.append(item)
+        if not items:
+            return SendResult([], rejected, 0)
+        
+        response = self.api.post(settings.SYNC_BATCH_ENDPOINT,
+                                 json={'id_compte': self.id_compte, 'pointages': items}, timeout=30)
+        if response.status_code in self.BATCH_UNSUPPORTED_STATUS:
+            return self._disable_batch()
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            if e.response.status_code not in self.REJECTED_STATUS:
+                raise
+            logger.warning(f"✗ Lot refusé par l'API ({e}): envoi pointage par pointage")
+            return None
         
-        self.sync_finished.emit(success_count, error_count)
+        try:
+            result = response.json()
+        except ValueError:
+            return self._disable_batch()
+        if not isinstance(result, dict):
+            return self._disable_batch()
+        
+        sent_ids = [item['local_id'] for item in items]
+        results = result.get('results')
+        if results is None:
+            if 'success' not in result:
+                return self._disable_batch()
+            if not result['success']:
+                logger.warning(f"✗ Lot refusé par l'API ({result.get('error')}): envoi pointage par pointage")
+                return None
+            return SendResult(sent_ids, rejected, 0)
+        
+        accepted = []
+        answered = set()
+        for position, item in enumerate(results):
+            local_id = item.get('local_id')
+            if local_id is None and position < len(items):
+                # Résultats sans identifiant : dans l'ordre d'envoi
+                local_id = items[position]['local_id']
+            if local_id not in sent_ids or local_id in answered:
+                continue
+            answered.add(local_id)
+            if item.get('success'):
+                accepted.append(local_id)
+            else:
+                error = str(item.get('error') or "Refusé par l'API")
+                logger.warning(f"✗ Erreur API pour pointage {local_id}: {error}")
+                rejected.append((local_id, error))
+        
+        # Pointages absents de "results" (API ne listant que les erreurs, liste vide...) :
+        # le succès global du lot s'applique
+        missing = [local_id for local_id in sent_ids if local_id not in answered]
+        if missing:
+            if result.get('success'):
+                accepted.extend(missing)
+            else:
+                error = str(result.get('error') or "Absent de la réponse de l'API")
+                logger.warning(f"✗ {len(missing)} pointage(s) du lot refusé(s): {error}")
+                rejected.extend((local_id, error) for local_id in missing)
+        return SendResult(accepted, rejected, 0)
+    
+    def _disable_batch(self) -> None:
+        """Le serveur ne supporte pas l'envoi par lot : passage en mode unitaire"""
+        self.batch_supported = False
+        logger.warning("Envoi par lot non supporté par le serveur: passage en mode unitaire")
+        return None
     
     def stop(self):
         """Arrête le worker"""
         self.running = False
+        self._executor.shutdown(wait=False)
 
 
 class MainWindow(QMainWindow):
     """Fenêtre principale moderne de l'application de timbrage"""
+    # Nouveau pointage enregistré : réveille SyncWorker
+    pointage_recorded = pyqtSignal()
     
     def __init__(self, db_manager, rfid_reader, employees_file, parent=None):
         super().__init__(parent)
         
         self.db_manager = db_manager
+        # Toutes les requêtes SQLite de l'interface passent par un thread dédié
+        self.async_db = AsyncDatabase(db_manager, self)
         self.rfid_reader = rfid_reader
         self.employees_file = Path(employees_file)
         self.employees = self.load_employees()
@@ -169,6 +478,9 @@ class MainWindow(QMainWindow):
             self.id_compte = api_config.ACCOUNT_ID
             self.api_key = api_config.API_KEY
             logger.info(f"Configuration API chargée: {self.api_url}, compte {self.id_compte}")
+            self.api = get_api_client(self.api_url, self.id_compte, self.api_key)
+            # Dashboard des employés : requêtes hors du thread Qt, dernière version en cache
+            self.dashboard = DashboardService(self.api, self.id_compte, parent=self)
         except ImportError as e:
             logger.error("ERREUR CRITIQUE: Fichier config/api_config.py manquant!")
             logger.error("Copiez config/api_config.example.py vers config/api_config.py")
@@ -219,15 +531,28 @@ class MainWindow(QMainWindow):
         self.ephemeride_timer = QTimer()
         self.ephemeride_timer.timeout.connect(self.check_date_change)
         self.ephemeride_timer.start(60000)  # Vérifier toutes les minutes
+        # Archivage des anciens pointages : au démarrage (différé) puis chaque nuit à minuit
+        QTimer.singleShot(60000, self.archive_old_pointages)
         
-        # Timer pour synchroniser les pointages toutes les 10 minutes
+        # Synchronisation des pointages dans un thread dédié, planifiée par le worker lui-même
+        # (requêtes SQLite et appels HTTP hors de la boucle d'événements de l'interface)
         self.sync_worker = SyncWorker(self.db_manager, self.api_url, self.id_compte, self.api_key)
-        self.sync_timer = QTimer()
-        self.sync_timer.timeout.connect(self.sync_worker.sync_pointages)
-        self.sync_timer.start(600000)  # 10 minutes = 600000 ms
-        logger.info("Synchronisation automatique activée (toutes les 10 minutes)")
-        # Première synchronisation après 30 secondes
-        QTimer.singleShot(30000, self.sync_worker.sync_pointages)
+        self.sync_thread = QThread()
+        self.sync_worker.moveToThread(self.sync_thread)
+        self.pointage_recorded.connect(self.sync_worker.wake)
+        self.sync_thread.started.connect(self.sync_worker.start_schedule)
+        self.sync_thread.start()
+        logger.info(f"Synchronisation automatique activée (premier cycle dans {settings.SYNC_STARTUP_DELAY:.0f} s)")
+        
+        # Maintenance de la base pendant les périodes creuses (aucun badge présent)
+        self.last_db_maintenance_date = None
+        self.db_maintenance_timer = QTimer()
+        self.db_maintenance_timer.timeout.connect(self.run_db_maintenance)
+        self.db_maintenance_timer.start(settings.DB_MAINTENANCE_INTERVAL * 1000)
+        self.db_backup = None
+        if settings.BACKUP_ENABLED:
+            self.db_backup = DatabaseBackup(self.db_manager.db_path, settings.BACKUP_DIR,
+                                            keep=settings.BACKUP_KEEP, compress=settings.BACKUP_COMPRESS)
         
         # Watchdog : vérifie toutes les 30s que la lecture RFID est active
         self.rfid_watchdog_timer = QTimer()
@@ -273,14 +598,6 @@ class MainWindow(QMainWindow):
         # Appliquer le style
         self.apply_styles()
         
-    def get_api_headers(self):
-        """Retourne les headers d'authentification pour les requêtes API"""
-        return {
-            'Content-Type': 'application/json',
-            'X-API-Key': self.api_key,
-            'X-Account-ID': str(self.id_compte)
-        }
-    
     def create_header(self):
         """Crée la barre d'en-tête"""
         header = QFrame()
@@ -601,17 +918,62 @@ class MainWindow(QMainWindow):
             if not self.current_employee:
                 self.instruction_label.setText(self.default_instruction)
                 logger.info(f"Éphéméride rafraîchie: {self.default_instruction}")
+            self.archive_old_pointages()
+    
+    def archive_old_pointages(self):
+        """
+        Déplace les pointages de plus de ARCHIVE_RETENTION_DAYS jours vers les archives mensuelles
+        
+        Un mois par appel sur le thread de la base : l'appel suivant est replanifié tant qu'il
+        reste des mois à archiver, les pointages de badges passent entre les deux.
+        """
+        # Erreurs journalisées par AsyncDatabase
+        self.async_db.call(
+            self.db_manager.archive_old_pointages,
+            settings.ARCHIVE_RETENTION_DAYS,
+            max_months=1,
+            on_result=self._on_pointages_archived
+        )
+    
+    def _on_pointages_archived(self, archived: int):
+        """Fin d'un pas d'archivage : continue avec le mois suivant s'il en reste"""
+        if archived:
+            QTimer.singleShot(1000, self.archive_old_pointages)
+    
+    def run_db_maintenance(self):
+        """
+        Maintenance périodique de la base, uniquement quand le terminal est inactif
+        
+        - à chaque passage : checkpoint WAL passif (limite la taille du journal)
+        - une fois par nuit (DB_MAINTENANCE_START_HOUR..END_HOUR) : optimize + VACUUM incrémental
+        - toutes les BACKUP_INTERVAL_HOURS heures : sauvegarde à chaud (thread dédié)
+        """
+        if self.is_card_present or self.is_processing:
+            logger.debug("Maintenance base reportée: badge en cours")
+            return
+        
+        # Exécutée dans le thread base de données ; erreurs journalisées par AsyncDatabase
+        now = datetime.now()
+        in_window = settings.DB_MAINTENANCE_START_HOUR <= now.hour < settings.DB_MAINTENANCE_END_HOUR
+        if in_window and self.last_db_maintenance_date != now.date():
+            self.last_db_maintenance_date = now.date()
+            self.async_db.call(self.db_manager.run_maintenance)
+        else:
+            self.async_db.call(
+                self.db_manager.checkpoint,
+                on_result=lambda result: logger.debug(f"Checkpoint WAL: {result[2]}/{result[1]} pages")
+            )
+        
+        if self.db_backup and self.db_backup.is_due(settings.BACKUP_INTERVAL_HOURS):
+            self.db_backup.start()
     
     def sync_employees_from_api(self):
-        """Synchronise employees.json depuis l'API (télécharge et recharge la liste)."""
+        """Synchronise employees.json depuis l'API (recharge la liste seulement si elle a changé)."""
         try:
-            url = f"{self.api_url}/api_download_employees_json.php?id_compte={self.id_compte}"
-            response = requests.get(url, headers=self.get_api_headers(), timeout=15, verify=False)
-            response.raise_for_status()
-            with open(self.employees_file, 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            data = json.loads(response.text)
-            count = len(data) if isinstance(data, list) else len(data.get('employees', []))
+            count = download_employees(self.api, self.id_compte, self.employees_file)
+            if count is None:
+                logger.debug("Synchronisation employés OK: aucun changement")
+                return
             self.reload_employees()
             logger.info(f"Synchronisation employés OK: {count} employé(s)")
         except Exception as e:
@@ -663,8 +1025,11 @@ class MainWindow(QMainWindow):
         
         logger.info(f"Badge présenté - enregistrement IMMÉDIAT du pointage pour {employee_name}")
         
-        success, pointage_type, error_msg = self.save_pointage(id_emp)
-        
+        # Enregistrement dans le thread base de données ; résultat affiché par show_pointage_result
+        self.save_pointage(id_emp, employee_name)
+    
+    def show_pointage_result(self, employee_name, success, pointage_type, error_msg):
+        """Affiche le résultat d'un pointage (appelé dans le thread Qt une fois le pointage traité)"""
         if success:
             # Couleur différente selon le type de pointage
             if pointage_type == "ENTREE":
@@ -720,61 +1085,53 @@ class MainWindow(QMainWindow):
         
         self.is_processing = False
     
-    def save_pointage(self, id_emp):
+    def save_pointage(self, id_emp, display_name):
         """
         Enregistre un pointage en LOCAL uniquement (instantané)
-        La synchronisation avec l'API se fera en arrière-plan toutes les 10 minutes
+        La synchronisation avec l'API suit en arrière-plan, quelques secondes plus tard
         
-        Protection anti-doublon: Empêche 2 pointages du même employé en moins de 5 secondes
+        Protection anti-doublon: Empêche 2 pointages du même employé en moins de
+        POINTAGE_MIN_INTERVAL secondes (30 minutes par défaut)
         
-        Returns:
-            (True, type_pointage, None) si succès
-            (False, None, message_erreur) si erreur
+        L'écriture se fait dans le thread base de données ; show_pointage_result reçoit ensuite
+        (True, type_pointage, None) si succès ou (False, None, message_erreur) si erreur.
         """
-        try:
-            from datetime import datetime, timedelta
-            
-            # Récupérer le dernier pointage pour déterminer le type ET vérifier le délai
-            last_pointage = self.db_manager.get_last_pointage(str(id_emp))
-            
-            # PROTECTION ANTI-DOUBLON: Vérifier qu'au moins 5 secondes se sont écoulées
-            if last_pointage:
-                last_timestamp = datetime.fromisoformat(last_pointage['timestamp'])
-                time_diff = (datetime.now() - last_timestamp).total_seconds()
-                
-                if time_diff < 1800.0:
-                    # Trop rapide! Refuser le pointage
-                    remaining = int(1800 - time_diff)
-                    minutes = remaining // 60
-                    seconds = remaining % 60
-                    logger.warning(f"Pointage refusé: délai trop court ({time_diff:.1f}s < 1800s) pour employé {id_emp}")
-                    return False, None, f"Veuillez attendre {minutes}min {seconds}s avant de pointer à nouveau"
-            
-            # Déterminer le type (ENTREE/SORTIE) en fonction du dernier pointage
-            if last_pointage and last_pointage.get('type') == 'ENTREE':
-                pointage_type = 'SORTIE'
-            else:
-                pointage_type = 'ENTREE'
+        employee_name = self.current_employee.get('name', 'Inconnu')
+        rfid_code = self.current_rfid
+        min_interval = settings.POINTAGE_MIN_INTERVAL
+        
+        def on_result(result):
+            local_id, pointage_type, remaining = result
             
-            # Enregistrer dans SQLite UNIQUEMENT (instantané, pas d'appel API)
-            employee_name = self.current_employee.get('name', 'Inconnu')
-            rfid_code = self.current_rfid
-            
-            local_id = self.db_manager.add_pointage(
-                employee_id=str(id_emp),
-                employee_name=employee_name,
-                rfid=rfid_code,
-                pointage_type=pointage_type
-            )
+            # PROTECTION ANTI-DOUBLON: pointage refusé si le délai n'est pas écoulé
+            if pointage_type is None:
+                remaining = int(remaining)
+                minutes = remaining // 60
+                seconds = remaining % 60
+                logger.warning(f"Pointage refusé: délai trop court (< {min_interval}s) pour employé {id_emp}")
+                self.show_pointage_result(display_name, False, None,
+                                          f"Veuillez attendre {minutes}min {seconds}s avant de pointer à nouveau")
+                return
             
             logger.info(f"Pointage LOCAL enregistré (ID: {local_id}, Type: {pointage_type}) - Sync en attente")
-            
-            return True, pointage_type, None
-            
-        except Exception as e:
-            error = str(e)
+            self.show_pointage_result(display_name, True, pointage_type, None)
+            self.pointage_recorded.emit()
+        
+        def on_error(error):
             logger.error(f"Erreur lors de l'enregistrement LOCAL du pointage: {error}")
-            return False, None, f"Erreur système: {error}"
+            self.show_pointage_result(display_name, False, None, f"Erreur système: {error}")
+        
+        # Type (ENTREE/SORTIE) et délai déterminés par la base, sans requête de lecture,
+        # puis pointage enregistré dans SQLite UNIQUEMENT (pas d'appel API)
+        self.async_db.call(
+            self.db_manager.record_pointage,
+            employee_id=str(id_emp),
+            employee_name=employee_name,
+            rfid=rfid_code,
+            min_interval=min_interval,
+            on_result=on_result,
+            on_error=on_error
+        )
     
     def show_employee_info(self, employee):
         """Affiche les informations de base de l'employé (SANS ouvrir la colonne de droite)"""
@@ -834,41 +1191,31 @@ class MainWindow(QMainWindow):
             self.reset_instruction_message()
     
     def fetch_employee_dashboard(self, id_emp):
-        """Récupère les données du dashboard depuis l'API"""
-        try:
-            url = f"{self.api_url}/api_get_employee_dashboard.php"
-            params = {
-                'id_emp': id_emp,
-                'id_compte': self.id_compte,
-                'date': datetime.now().strftime("%Y-%m-%d")
-            }
-            
-            logger.info(f"Récupération des données dashboard pour employé {id_emp}...")
-            
-            response = requests.get(url, params=params, headers=self.get_api_headers(), timeout=10, verify=False)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data.get('success'):
-                self.dashboard_data = data['data']
-                self.update_dashboard_display()
-                
-                # Démarrer un timer pour rafraîchir les données toutes les 30 secondes
-                if self.data_fetch_timer:
-                    self.data_fetch_timer.stop()
-                    
-                self.data_fetch_timer = QTimer()
-                self.data_fetch_timer.timeout.connect(lambda: self.fetch_employee_dashboard(id_emp))
-                self.data_fetch_timer.start(30000)  # 30 secondes
-                
-            else:
-                logger.error(f"Erreur API: {data.get('error', 'Erreur inconnue')}")
-                self.show_error_message("Erreur lors du chargement des données")
-                
-        except Exception as e:
-            logger.error(f"Erreur lors de la récupération des données: {e}")
-            self.show_error_message(f"Erreur: {str(e)}")
+        """
+        Affiche le dashboard d'un employé sans bloquer l'interface
+        
+        La dernière version connue s'affiche immédiatement ; elle est rafraîchie en arrière-plan
+        si elle a plus de DASHBOARD_TTL secondes, puis toutes les 30 secondes tant que le badge
+        est présent (voir DashboardService).
+        
+        Non appelée pour l'instant : la colonne de droite reste masquée au passage d'un badge
+        (voir show_employee_info).
+        """
+        def on_data(data):
+            self.dashboard_data = data
+            self.update_dashboard_display()
+        
+        def on_error(error):
+            # Une version en cache reste affichée si le rafraîchissement échoue
+            if self.dashboard_data is None:
+                self.show_error_message(f"Erreur: {error}")
+        
+        self.dashboard.get(id_emp, on_data, on_error)
+        
+        if self.data_fetch_timer is None:
+            self.data_fetch_timer = QTimer()
+            self.data_fetch_timer.timeout.connect(lambda: self.fetch_employee_dashboard(id_emp))
+            self.data_fetch_timer.start(30000)  # 30 secondes
             
     def update_dashboard_display(self):
         """Met à jour l'affichage du dashboard avec les données"""
@@ -945,7 +1292,11 @@ class MainWindow(QMainWindow):
         # Masquer/réinitialiser la colonne de droite
         self.right_column.setVisible(False)
         
-        # Effacer les données du dashboard
+        # Effacer les données du dashboard (une réponse en retard ne doit pas s'afficher)
+        if self.data_fetch_timer:
+            self.data_fetch_timer.stop()
+            self.data_fetch_timer = None
+        self.dashboard.cancel()
         self.dashboard_data = None
         
         # Masquer les pointages
@@ -974,10 +1325,11 @@ class MainWindow(QMainWindow):
         self.dashboard_data = None
         self.is_processing = False
         
-        # Arrêter le timer de fetch de données s'il existe
+        # Arrêter le timer de fetch de données s'il existe, abandonner les requêtes en cours
         if self.data_fetch_timer:
             self.data_fetch_timer.stop()
             self.data_fetch_timer = None
+        self.dashboard.cancel()
         
         # La colonne de droite reste cachée (pas d'affichage de dashboard)
         self.right_column.setVisible(False)
@@ -1229,12 +1581,22 @@ class MainWindow(QMainWindow):
         
         if self.data_fetch_timer:
             self.data_fetch_timer.stop()
+        self.dashboard.shutdown()
         
         if self.employees_sync_timer:
             self.employees_sync_timer.stop()
         
         if self.rfid_watchdog_timer:
             self.rfid_watchdog_timer.stop()
+        
+        if self.db_maintenance_timer:
+            self.db_maintenance_timer.stop()
+        
+        # Arrêter le thread de synchronisation puis le thread base de données
+        self.sync_worker.stop()
+        self.sync_thread.quit()
+        self.sync_thread.wait()
+        self.async_db.shutdown()
             
         event.accept()
 
@@ -13,6 +13,8 @@ from PyQt5.QtGui import QFont
 import requests
 import logging
 
+from src.api import get_api_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -254,7 +256,7 @@ class RFIDConfigPanel(QWidget):
         try:
             # Appel à l'API
             url = f"{api_url}/api_list_employees.php?id_compte={id_compte}"
-            response = requests.get(url, timeout=10, verify=False)
+            response = get_api_client(api_url).get(url)
             response.raise_for_status()
             
             data = response.json()
@@ -389,7 +391,7 @@ class RFIDConfigPanel(QWidget):
                 'rfid_code': rfid_code
             }
             
-            response = requests.post(url, json=data, timeout=10, verify=False)
+            response = get_api_client(api_url).post(url, json=data)
             response.raise_for_status()
             
             result = response.json()